@@ -2,12 +2,22 @@
 import requests
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from legacy_utils.site_router import get_site_router
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
+def _timed_get(url):
+    """ヘッダー受信までの時間（TTFB）を測る。本文はダウンロードしない"""
+    try:
+        start_time = time.perf_counter()
+        with requests.get(url, timeout=10, stream=True) as response:
+            return url, response.status_code, time.perf_counter() - start_time, None
+    except requests.exceptions.RequestException as e:
+        return url, 'ERROR', None, e
+
 def check_speed():
     router = get_site_router()
     sites = router.get_all_sites()
@@ -15,24 +25,19 @@ def check_speed():
     urls = [f"https://{site.subdomain}.av-kantei.com" for site in sites]
     urls.append("https://av-kantei.com") # Add main site
     
-    print(f"{'URL':<40} | {'Status':<10} | {'Time (s)':<10}")
+    print(f"{'URL':<40} | {'Status':<10} | {'TTFB (s)':<10}")
     print("-" * 65)
     
     results = []
     
-    for url in urls:
-        try:
-            start_time = time.time()
-            response = requests.get(url, timeout=10)
-            end_time = time.time()
-            duration = end_time - start_time
-            
-            status_code = response.status_code
-            print(f"{url:<40} | {status_code:<10} | {duration:.4f}")
+    # 全サイトを同時に計測（所要時間は最も遅いサイト分だけ。表示順はurls順のまま）
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        for url, status_code, duration, error in executor.map(_timed_get, urls):
+            if error is None:
+                print(f"{url:<40} | {status_code:<10} | {duration:.4f}")
+            else:
+                print(f"{url:<40} | {'ERROR':<10} | {str(error)}")
             results.append((url, status_code, duration))
-        except requests.exceptions.RequestException as e:
-            print(f"{url:<40} | {'ERROR':<10} | {str(e)}")
-            results.append((url, 'ERROR', None))
 
 if __name__ == "__main__":
     check_speed()
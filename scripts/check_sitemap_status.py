@@ -1,5 +1,6 @@
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 sites = [
     "sd06-hitozuma",
@@ -9,20 +10,25 @@ sites = [
     "sd10-otona"
 ]
 
-print("Checking sitemap status...")
-for site in sites:
+def check_sitemap(site):
     url = f"https://{site}.av-kantei.com/wp-sitemap.xml"
     try:
-        start = time.time()
-        response = requests.get(url, timeout=10)
-        end = time.time()
-        elapsed = end - start
+        start = time.perf_counter()
+        # 状態確認だけなのでHEADで本文（サイトマップXML）は受け取らない
+        response = requests.head(url, timeout=10, allow_redirects=True)
+        elapsed = time.perf_counter() - start
         
         status = response.status_code
-        size = len(response.content)
+        size = response.headers.get("Content-Length", "?")
         
-        print(f"[{site}] Status: {status}, Time: {elapsed:.2f}s, Size: {size} bytes")
+        lines = [f"[{site}] Status: {status}, Time: {elapsed:.2f}s, Size: {size} bytes"]
         if status != 200:
-            print(f"  -> Error: {status}")
+            lines.append(f"  -> Error: {status}")
+        return "\n".join(lines)
     except Exception as e:
-        print(f"[{site}] Failed to connect: {e}")
+        return f"[{site}] Failed to connect: {e}"
+
+print("Checking sitemap status...")
+with ThreadPoolExecutor(max_workers=len(sites)) as executor:
+    for report in executor.map(check_sitemap, sites):
+        print(report)
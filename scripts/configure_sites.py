@@ -1,9 +1,18 @@
 import os
 import sys
+import functools
 import logging
 import requests
 import base64
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from src.core.config import ensure_dotenv
 
 # ????
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -55,33 +64,42 @@ SITES = [
     ),
 ]
 
+# サブドメイン→設定の索引（get_site_configを線形探索にしない）
+_SITE_INDEX = {site.subdomain: site for site in SITES}
+
 def _required_env(name: str) -> str:
     value = os.getenv(name, "").strip()
     if not value:
         raise RuntimeError(f"Missing required env var: {name}")
     return value
 
-def get_site_config(subdomain: str) -> SiteConfig | None:
-    """????????????????"""
-    for site in SITES:
-        if site.subdomain == subdomain:
-            return site
-    return None
-
-def update_site_settings(site: SiteConfig):
-    base_url = f"https://{site.subdomain}.av-kantei.com"
-    api_url = f"{base_url}/wp-json/wp/v2/settings"
+def wp_credentials() -> tuple[str, str]:
+    """WPの(ユーザー名, アプリパスワード)。.envも読み込んだうえで環境変数から取得し、未設定なら例外"""
+    ensure_dotenv()
+    return _required_env("WP_USERNAME"), _required_env("WP_APP_PASSWORD")
 
-    # Basic??????
-    wp_username = _required_env("WP_USERNAME")
-    wp_app_password = _required_env("WP_APP_PASSWORD")
+@functools.cache
+def _auth_headers() -> dict[str, str]:
+    """Basic認証ヘッダー（環境変数の検証とエンコードは初回の一度だけ）"""
+    wp_username, wp_app_password = wp_credentials()
     credentials = f"{wp_username}:{wp_app_password}"
     encoded = base64.b64encode(credentials.encode()).decode()
-    headers = {
+    return {
         "Authorization": f"Basic {encoded}",
         "Content-Type": "application/json"
     }
 
+def get_site_config(subdomain: str) -> SiteConfig | None:
+    """????????????????"""
+    return _SITE_INDEX.get(subdomain)
+
+def update_site_settings(site: SiteConfig, session: requests.Session | None = None):
+    base_url = f"https://{site.subdomain}.av-kantei.com"
+    api_url = f"{base_url}/wp-json/wp/v2/settings"
+    http = session or requests
+
+    headers = _auth_headers()
+
     data = {
         "title": site.title,
         "description": site.tagline
@@ -89,13 +107,13 @@ def update_site_settings(site: SiteConfig):
 
     try:
         logger.info(f"Updating settings for {base_url}...")
-        response = requests.post(api_url, json=data, headers=headers, timeout=10)
+        response = http.post(api_url, json=data, headers=headers, timeout=10)
 
         if response.status_code == 200:
             logger.info(f"Successfully updated title/tagline for {site.subdomain}")
 
             # ????
-            verify_res = requests.get(api_url, headers=headers, timeout=10)
+            verify_res = http.get(api_url, headers=headers, timeout=10)
             if verify_res.status_code == 200:
                 current = verify_res.json()
                 if current.get("title") == site.title:
@@ -110,8 +128,9 @@ def update_site_settings(site: SiteConfig):
 
 def main():
     logger.info("Starting site configuration updates...")
-    for site in SITES:
-        update_site_settings(site)
+    # サイト同士は独立しているので並列に更新（更新と確認のGETは同じ接続を使い回す）
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=len(SITES)) as executor:
+        list(executor.map(lambda site: update_site_settings(site, session=session), SITES))
     logger.info("All site updates completed.")
 
 if __name__ == "__main__":
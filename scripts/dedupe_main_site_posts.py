@@ -11,15 +11,17 @@ import io
 import json
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from src.core.config import get_config
+from src.core.log_queue import start_queue_logging
 from src.clients.wordpress import WPClient
 
 
@@ -48,6 +50,7 @@ def setup_logging(level: str) -> None:
         datefmt="%Y-%m-%d %H:%M:%S",
         handlers=[logging.StreamHandler(sys.stdout)],
     )
+    start_queue_logging()
 
 
 def _status_rank(status: str) -> int:
@@ -64,33 +67,56 @@ def _status_rank(status: str) -> int:
     return order.get((status or "").lower(), 8)
 
 
-def fetch_posts(wp: WPClient, per_page: int, max_pages: int, status: str) -> list[dict[str, Any]]:
-    posts: list[dict[str, Any]] = []
-    for page in range(1, max_pages + 1):
-        params = {
-            "per_page": per_page,
-            "page": page,
-            "status": status,
-            "orderby": "date",
-            "order": "desc",
-            "context": "edit",
-            "_fields": "id,status,date_gmt,date,link,slug,meta,content,title,excerpt",
-        }
+def _fetch_page(wp: WPClient, page: int, per_page: int, status: str) -> tuple[list[dict[str, Any]], int]:
+    """1ページ分を取得し (posts, X-WP-TotalPages) を返す"""
+    params = {
+        "per_page": per_page,
+        "page": page,
+        "status": status,
+        "orderby": "date",
+        "order": "desc",
+        "context": "edit",
+        "_fields": "id,status,date_gmt,date,link,slug,meta,content,title,excerpt",
+    }
+    resp = wp._request("GET", "posts", params=params)
+    if resp.status_code in (401, 403, 404):
+        params.pop("context", None)
         resp = wp._request("GET", "posts", params=params)
-        if resp.status_code in (401, 403, 404):
-            params.pop("context", None)
-            resp = wp._request("GET", "posts", params=params)
 
-        if resp.status_code == 400:
-            break
-        resp.raise_for_status()
-        page_posts = resp.json()
+    if resp.status_code == 400:
+        return [], 0
+    resp.raise_for_status()
+    try:
+        total_pages = int(resp.headers.get("X-WP-TotalPages", "0") or 0)
+    except ValueError:
+        total_pages = 0
+    return resp.json() or [], total_pages
+
+
+def iter_posts(wp: WPClient, per_page: int, max_pages: int, status: str, workers: int = 8) -> Iterator[dict[str, Any]]:
+    """投稿をページ到着順に1件ずつ返す（全件をメモリに溜めない）"""
+    if max_pages < 1:
+        return
+    first_page, total_pages = _fetch_page(wp, 1, per_page, status)
+    yield from first_page
+    if len(first_page) < per_page or max_pages <= 1:
+        return
+
+    if total_pages:
+        # 総ページ数が分かる場合は2ページ目以降を並列取得（順序は維持）
+        pages = range(2, min(total_pages, max_pages) + 1)
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            for page_posts, _ in executor.map(lambda p: _fetch_page(wp, p, per_page, status), pages):
+                yield from page_posts
+        return
+
+    for page in range(2, max_pages + 1):
+        page_posts, _ = _fetch_page(wp, page, per_page, status)
         if not page_posts:
             break
-        posts.extend(page_posts)
+        yield from page_posts
         if len(page_posts) < per_page:
             break
-    return posts
 
 
 def extract_fanza_id(wp: WPClient, post: dict[str, Any]) -> str | None:
@@ -103,6 +129,7 @@ def main() -> int:
     parser.add_argument("--status", type=str, default="any", help="対象ステータス（default: any）")
     parser.add_argument("--per-page", type=int, default=100)
     parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8, help="取得/削除の並列数")
     parser.add_argument("--log-level", type=str, default="INFO")
     args = parser.parse_args()
 
@@ -118,13 +145,19 @@ def main() -> int:
     logger.info(f"Target site: {config.wp_base_url}")
     logger.info(f"Fetch posts: status={args.status}, per_page={args.per_page}, max_pages={args.max_pages}")
 
-    raw_posts = fetch_posts(wp, per_page=args.per_page, max_pages=args.max_pages, status=args.status)
-    logger.info(f"Fetched posts: {len(raw_posts)}")
-
     groups: dict[str, list[PostRef]] = {}
     skipped_no_id = 0
-
-    for post in raw_posts:
+    fetched_posts = 0
+
+    # 本文などを含む生の投稿dictは保持せず、到着順にPostRefへ縮約する
+    for post in iter_posts(
+        wp,
+        per_page=args.per_page,
+        max_pages=args.max_pages,
+        status=args.status,
+        workers=args.workers,
+    ):
+        fetched_posts += 1
         fanza_id = extract_fanza_id(wp, post)
         if not fanza_id:
             skipped_no_id += 1
@@ -140,13 +173,14 @@ def main() -> int:
         )
         groups.setdefault(fanza_id, []).append(ref)
 
+    logger.info(f"Fetched posts: {fetched_posts}")
     dup_groups = {k: v for k, v in groups.items() if len(v) > 1}
     logger.info(f"Posts without fanza_id (skipped): {skipped_no_id}")
     logger.info(f"Duplicate groups: {len(dup_groups)}")
 
     report = {
         "base_url": config.wp_base_url,
-        "fetched_posts": len(raw_posts),
+        "fetched_posts": fetched_posts,
         "skipped_no_id": skipped_no_id,
         "duplicate_groups": len(dup_groups),
         "apply": bool(args.apply),
@@ -158,6 +192,7 @@ def main() -> int:
     }
 
     delete_count = 0
+    pending: list[PostRef] = []
     for fanza_id, items in sorted(dup_groups.items(), key=lambda kv: kv[0]):
         # keep: status優先→古い日付優先→ID小さい方（安定化）
         items_sorted = sorted(
@@ -176,17 +211,20 @@ def main() -> int:
             }
         )
         report["kept"].append(keep.__dict__)
+        pending.extend(to_delete)
 
-        for r in to_delete:
-            if args.apply:
-                try:
-                    wp.delete_post(r.post_id, force=bool(args.force))
-                    delete_count += 1
-                    report["deleted"].append({**r.__dict__, "deleted_at": datetime.now().isoformat()})
-                except Exception as e:
-                    logger.error(f"Delete failed: fanza_id={fanza_id} post_id={r.post_id} err={e}")
-            else:
-                report["deleted"].append({**r.__dict__, "dry_run": True})
+    if args.apply:
+        # batch/v1でまとめて削除（非対応サイトでは個別DELETEを並列実行）
+        errors = wp.delete_posts([r.post_id for r in pending], force=bool(args.force), workers=args.workers)
+        for r in pending:
+            err = errors.get(r.post_id)
+            if err is not None:
+                logger.error(f"Delete failed: fanza_id={r.fanza_id} post_id={r.post_id} err={err}")
+                continue
+            delete_count += 1
+            report["deleted"].append({**r.__dict__, "deleted_at": datetime.now().isoformat()})
+    else:
+        report["deleted"].extend({**r.__dict__, "dry_run": True} for r in pending)
 
     report_path = project_root / "data" / f"dedupe_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
     report_path.parent.mkdir(parents=True, exist_ok=True)
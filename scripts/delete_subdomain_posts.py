@@ -1,7 +1,6 @@
 import os
 import sys
 import logging
-import io
 from pathlib import Path
 
 # プロジェクトルートをパスに追加
@@ -9,12 +8,13 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from src.clients.wordpress import WPClient
+from src.core.log_queue import start_queue_logging
 from scripts.configure_sites import SITES, SiteConfig
 
 # Windows環境での文字化け対策
 if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +23,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DELETE_WORKERS = 8
+
 # 共通ログイン情報
 def _required_env(name: str) -> str:
     value = os.getenv(name, "").strip()
@@ -44,19 +46,19 @@ def delete_all_posts_from_site(site: SiteConfig):
     while True:
         # 100件ずつ取得 (ゴミ箱も含めて全削除する場合 status='any')
         try:
-            posts = wp_client.get_recent_posts(limit=100, status="any")
+            posts = wp_client.get_recent_posts(limit=100, status="any", fields="id")
             if not posts:
                 break
                 
             logger.info(f"[{site.subdomain}] Found {len(posts)} posts. Deleting...")
-            for post in posts:
-                try:
-                    post_id = post["id"]
-                    # 永久削除 (force=True) する
-                    wp_client.delete_post(post_id, force=True)
+
+            # 永久削除 (force=True) をbatch/v1でまとめて実行（非対応なら個別DELETEを並列実行）
+            errors = wp_client.delete_posts([p["id"] for p in posts], force=True, workers=DELETE_WORKERS)
+            for post_id, err in errors.items():
+                if err is None:
                     deleted_count += 1
-                except Exception as e:
-                    logger.error(f"[{site.subdomain}] Failed to delete post {post.get('id')}: {e}")
+                else:
+                    logger.error(f"[{site.subdomain}] Failed to delete post {post_id}: {err}")
             
             logger.info(f"[{site.subdomain}] Deleted {deleted_count} posts so far...")
             
@@ -69,6 +71,7 @@ def delete_all_posts_from_site(site: SiteConfig):
     logger.info(f"[{site.subdomain}] Finished. Total deleted: {deleted_count}")
 
 def main():
+    start_queue_logging()
     logger.info("Starting subdomain posts cleanup...")
     # SITES は configure_sites.py で定義されているサブドメインのリスト
     for site in SITES:
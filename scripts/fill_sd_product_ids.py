@@ -8,7 +8,6 @@ Fill missing product IDs ("品番") for SD sites.
 from __future__ import annotations
 
 import argparse
-import io
 import logging
 import re
 import sys
@@ -17,12 +16,12 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-from scripts.configure_sites import SITES, WP_APP_PASSWORD, WP_USERNAME
+from scripts.configure_sites import SITES, wp_credentials
 from src.clients.wordpress import WPClient
 
 if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8")
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
 
 logging.basicConfig(
     level=logging.INFO,
@@ -40,6 +39,9 @@ PRODUCT_ROW_RE = re.compile(
     r'(<div class="aa-th" role="cell">\s*' + PRODUCT_LABEL + r'\s*</div>\s*<div class="aa-td" role="cell">\s*)([^<]*)(\s*</div>)',
     re.S,
 )
+# batch/v1 の1リクエスト上限（WPClient._BATCH_MAX）に合わせて溜めてから送る
+UPDATE_BATCH_SIZE = 25
+UPDATE_WORKERS = 8
 EMPTY_VALUES = {"", "N/A", "n/a", "\u672a\u8a2d\u5b9a", "-", "\u306a\u3057", "&nbsp;"}
 
 
@@ -56,8 +58,9 @@ def make_product_row(product_id: str) -> str:
     )
 
 
-def _find_spec_section_bounds(html: str) -> tuple[int, int] | None:
-    spec_start = html.find(SPEC_MARKER)
+def _find_spec_section_bounds(html: str, spec_start: int | None = None) -> tuple[int, int] | None:
+    if spec_start is None:
+        spec_start = html.find(SPEC_MARKER)
     if spec_start == -1:
         return None
     # Scope to this spec section for safer insertion.
@@ -75,17 +78,23 @@ def fill_or_insert_product_id(html: str, product_id: str) -> tuple[str, str]:
     if not product_id:
         return html, "unchanged"
 
+    # Locate the spec section once; both the row search and the insertion start from it.
+    spec_start = html.find(SPEC_MARKER)
+
     # 1) If 品番 row exists, fill only when empty.
-    m = PRODUCT_ROW_RE.search(html)
+    # Skip the regex scan entirely when the label never appears, and start it at
+    # the spec section (the row lives there) instead of the top of the body.
+    m = PRODUCT_ROW_RE.search(html, max(spec_start, 0)) if PRODUCT_LABEL in html else None
     if m:
         current = (m.group(2) or "").strip()
         if not is_empty_value(current):
             return html, "unchanged"
-        new_html = PRODUCT_ROW_RE.sub(r"\1" + product_id + r"\3", html, count=1)
+        # Splice at the matched value instead of re-running the regex via sub().
+        new_html = html[:m.start(2)] + product_id + html[m.end(2):]
         return new_html, "filled"
 
     # 2) Insert 品番 row into spec table.
-    bounds = _find_spec_section_bounds(html)
+    bounds = _find_spec_section_bounds(html, spec_start)
     if not bounds:
         return html, "skip_no_spec"
     spec_start, spec_end = bounds
@@ -113,9 +122,25 @@ def fill_or_insert_product_id(html: str, product_id: str) -> tuple[str, str]:
     return html[:spec_start] + new_spec + html[spec_end:], "inserted"
 
 
+def _flush_updates(wp: WPClient, pending: dict[int, tuple[str, str, str]], stats: dict[str, int]) -> None:
+    """溜めた本文更新をbatch/v1でまとめて送る（使えないサイトでは並列に1件ずつ）"""
+    if not pending:
+        return
+    errors = wp.update_posts({pid: {"content": content} for pid, (content, _, _) in pending.items()}, workers=UPDATE_WORKERS)
+    for post_id, (_, action, fanza_id) in pending.items():
+        error = errors.get(post_id, "no response")
+        if error is None:
+            stats["updated"] += 1
+            logger.info(f"updated post id={post_id} action={action} pid={fanza_id}")
+        else:
+            stats["failed"] += 1
+            logger.error(f"update failed post id={post_id} action={action} pid={fanza_id}: {error}")
+    pending.clear()
+
+
 def run_for_site(subdomain: str, max_pages: int, dry_run: bool) -> dict[str, int]:
     base_url = f"https://{subdomain}.av-kantei.com"
-    wp = WPClient(base_url, WP_USERNAME, WP_APP_PASSWORD)
+    wp = WPClient(base_url, *wp_credentials())
     stats = {
         "scanned": 0,
         "updated": 0,
@@ -124,7 +149,10 @@ def run_for_site(subdomain: str, max_pages: int, dry_run: bool) -> dict[str, int
         "skip_no_id": 0,
         "skip_no_spec": 0,
         "skip_no_table": 0,
+        "failed": 0,
     }
+    # post_id -> (新しい本文, action, 品番)
+    pending: dict[int, tuple[str, str, str]] = {}
 
     for post in wp.iter_posts(
         status="publish",
@@ -165,10 +193,11 @@ def run_for_site(subdomain: str, max_pages: int, dry_run: bool) -> dict[str, int
             logger.info(f"[dry-run] update post id={post_id} action={action} pid={fanza_id}")
             continue
 
-        wp.update_post(post_id, {"content": new_content})
-        stats["updated"] += 1
-        logger.info(f"updated post id={post_id} action={action} pid={fanza_id}")
+        pending[post_id] = (new_content, action, fanza_id)
+        if len(pending) >= UPDATE_BATCH_SIZE:
+            _flush_updates(wp, pending, stats)
 
+    _flush_updates(wp, pending, stats)
     return stats
 
 
@@ -195,7 +224,7 @@ def main() -> None:
             f"{subdomain}: scanned={stats['scanned']}, updated={stats['updated']}, "
             f"filled={stats['filled']}, inserted={stats['inserted']}, "
             f"skip_no_id={stats['skip_no_id']}, skip_no_spec={stats['skip_no_spec']}, "
-            f"skip_no_table={stats['skip_no_table']}"
+            f"skip_no_table={stats['skip_no_table']}, failed={stats['failed']}"
         )
 
 
@@ -13,6 +13,9 @@ from src.clients.wordpress import WPClient
 
 logger = logging.getLogger(__name__)
 
+_DATA_SITE_RE = re.compile(r'data-site="[^"]*"')
+_SITE_CLASS_RE = re.compile(r'aa-site-[a-z0-9-]+')
+
 
 def extract_slug(url_or_slug: str) -> str:
     value = (url_or_slug or "").strip()
@@ -28,18 +31,21 @@ def apply_site_theme(content: str, site_id: str) -> tuple[str, bool]:
     updated = content
     changed = False
 
-    updated2 = re.sub(r'data-site="[^"]*"', f'data-site="{site_id}"', updated, count=1)
-    if updated2 != updated:
-        changed = True
-        updated = updated2
+    # マーカー文字列が無ければ正規表現の走査自体を省く
+    if 'data-site="' in updated:
+        updated2 = _DATA_SITE_RE.sub(f'data-site="{site_id}"', updated, count=1)
+        if updated2 != updated:
+            changed = True
+            updated = updated2
     elif '<div class="aa-wrap' in updated:
         updated = updated.replace('<div class="aa-wrap', f'<div class="aa-wrap" data-site="{site_id}"', 1)
         changed = True
 
-    updated2 = re.sub(r'aa-site-[a-z0-9-]+', f'aa-site-{site_id}', updated, count=1)
-    if updated2 != updated:
-        changed = True
-        updated = updated2
+    if "aa-site-" in updated:
+        updated2 = _SITE_CLASS_RE.sub(f'aa-site-{site_id}', updated, count=1)
+        if updated2 != updated:
+            changed = True
+            updated = updated2
 
     return updated, changed
 
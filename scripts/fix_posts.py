@@ -3,8 +3,8 @@
 - 投稿済みの記事からエラー画像を見つけて再取得・再アップロード
 """
 import logging
+import re
 import sys
-import io
 from pathlib import Path
 
 # プロジェクトルートをパスに追加
@@ -18,8 +18,8 @@ from src.processor.images import ImageTools, ImagePlaceholderError
 
 # Windows環境での文字化け対策
 if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
 
 logging.basicConfig(
     level=logging.INFO,
@@ -28,6 +28,62 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 本文中のアフィリエイトリンクから商品IDを拾う
+_CID_RE = re.compile(r'cid=([a-z0-9]+)')
+
+# 画像変換/アップロードに失敗した投稿に残るホスト
+_BROKEN_IMAGE_HOST = "pics.dmm.co.jp"
+# 修正処理で参照する項目だけを返させる
+_POST_FIELDS = "id,title,content,meta,featured_media"
+
+
+def find_target_posts(wp_client: WPClient, limit: int = 100) -> list[dict]:
+    """
+    最新limit件のうち修正候補（本文に元画像URLが残る or アイキャッチ無し）だけを本文付きで取得。
+    本文の一致判定はWP側のsearchに任せ、対象外の投稿本文は転送しない。
+    """
+    base_params = {"status": "publish", "context": "edit", "_fields": _POST_FIELDS}
+    try:
+        # 対象範囲（最新limit件）をIDとアイキャッチだけで把握
+        response = wp_client._request("GET", "posts", params={
+            "per_page": limit,
+            "status": "publish",
+            "orderby": "date",
+            "order": "desc",
+            "_fields": "id,featured_media",
+        })
+        response.raise_for_status()
+        heads = response.json()
+        if not heads:
+            return []
+        ids = [p["id"] for p in heads]
+
+        response = wp_client._request("GET", "posts", params={
+            **base_params,
+            "include": ",".join(map(str, ids)),
+            "per_page": len(ids),
+            "search": _BROKEN_IMAGE_HOST,
+        })
+        response.raise_for_status()
+        found = {p["id"]: p for p in response.json()}
+
+        no_featured = [p["id"] for p in heads if not p.get("featured_media") and p["id"] not in found]
+        if no_featured:
+            response = wp_client._request("GET", "posts", params={
+                **base_params,
+                "include": ",".join(map(str, no_featured)),
+                "per_page": len(no_featured),
+            })
+            response.raise_for_status()
+            found.update((p["id"], p) for p in response.json())
+    except Exception as e:
+        # search/includeが使えないホストでは従来どおり全件取得して手元で判定
+        logger.warning(f"サーバー側の絞り込みに失敗したため全件取得します: {e}")
+        return wp_client.get_recent_posts(limit=limit, status="publish", fields=_POST_FIELDS)
+
+    # 元の並び（新しい順）を維持
+    return [found[i] for i in ids if i in found]
+
 def main():
     config = get_config()
     wp_client = WPClient(
@@ -42,7 +98,7 @@ def main():
     image_tools = ImageTools()
     
     logger.info("修正が必要な投稿を検索中...")
-    posts = wp_client.get_recent_posts(limit=100, status="publish")
+    posts = find_target_posts(wp_client, limit=100)
     
     fixed_count = 0
     
@@ -52,13 +108,12 @@ def main():
         content = post["content"]["rendered"]
         
         # pics.dmm.co.jp が残っている = Apple/WebP 変換・アップロードに失敗している可能性が高い
-        if "pics.dmm.co.jp" not in content and post.get("featured_media"):
+        if _BROKEN_IMAGE_HOST not in content and post.get("featured_media"):
             continue
             
         fanza_id = post.get("meta", {}).get("fanza_product_id")
         if not fanza_id:
-            import re
-            match = re.search(r'cid=([a-z0-9]+)', content)
+            match = _CID_RE.search(content)
             if match:
                 fanza_id = match.group(1)
         
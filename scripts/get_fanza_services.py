@@ -2,11 +2,10 @@ import os
 import requests
 import json
 import sys
-import io
 from dotenv import load_dotenv
 
 # Set encoding for Windows terminal
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+sys.stdout.reconfigure(encoding='utf-8')
 
 def get_service_list():
     load_dotenv()
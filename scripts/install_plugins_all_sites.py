@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import argparse
 import logging
+import random
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import requests
@@ -23,32 +25,45 @@ DEFAULT_PLUGINS = [
     "wp-optimize",
 ]
 
-SITE_ALIASES = {
-    "sd1": "sd01-chichi",
-    "sd01": "sd01-chichi",
-    "sd2": "sd02-shirouto",
-    "sd02": "sd02-shirouto",
-    "sd3": "sd03-gyaru",
-    "sd03": "sd03-gyaru",
-    "sd4": "sd04-chijo",
-    "sd04": "sd04-chijo",
-    "sd5": "sd05-seiso",
-    "sd05": "sd05-seiso",
-    "sd6": "sd06-hitozuma",
-    "sd06": "sd06-hitozuma",
-    "sd7": "sd07-oneesan",
-    "sd07": "sd07-oneesan",
-    "sd8": "sd08-jukujo",
-    "sd08": "sd08-jukujo",
-    "sd9": "sd09-iyashi",
-    "sd09": "sd09-iyashi",
-    "sd10": "sd10-otona",
-    "main": "av-kantei.com",
-}
+MAIN_URL = "https://av-kantei.com"
+
+
+def _site_url(subdomain: str) -> str:
+    return f"https://{subdomain}.av-kantei.com"
+
+
+def _build_url_index() -> dict[str, str]:
+    """--site に渡せる別名（sd1 / sd01 / sd01-chichi / main）→ 対象URL"""
+    index = {"main": MAIN_URL, "av-kantei.com": MAIN_URL}
+    for site in cs.SITES:
+        url = _site_url(site.subdomain)
+        prefix = site.subdomain.split("-")[0]
+        index[site.subdomain] = url
+        index[prefix] = url
+        if prefix[2:].isdigit():
+            index[f"sd{int(prefix[2:])}"] = url
+    return index
+
+
+_URL_BY_KEY = _build_url_index()
 
 REQUEST_TIMEOUT = 60
 MAX_RETRIES = 3
 RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_DELAY = 30.0
+
+# base_url -> 404にならなかったRESTルートの添字（以降はそのルートから試し、余計な404往復を省く）
+_WORKING_ROUTE: dict[str, int] = {}
+
+
+def _retry_delay(attempt: int, res: requests.Response | None = None) -> float:
+    """Retry-After（秒数）があればそれに従い、無ければ指数バックオフ。並列実行時に重ならないようジッターを足す"""
+    if res is not None:
+        try:
+            return min(MAX_RETRY_DELAY, float(res.headers.get("Retry-After", ""))) + random.uniform(0, 0.25 * attempt)
+        except ValueError:
+            pass
+    return min(MAX_RETRY_DELAY, 1.5 ** attempt) + random.uniform(0, 0.5)
 
 
 def _request_with_retry(session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
@@ -60,13 +75,15 @@ def _request_with_retry(session: requests.Session, method: str, url: str, **kwar
             if res.status_code in RETRY_STATUSES:
                 last_res = res
                 logger.warning("%s %s -> %s (attempt %s/%s)", method, url, res.status_code, attempt, MAX_RETRIES)
-                time.sleep(1.5 * attempt)
+                if attempt < MAX_RETRIES:
+                    time.sleep(_retry_delay(attempt, res))
                 continue
             return res
         except Exception as exc:  # noqa: BLE001
             last_exc = exc
             logger.warning("%s %s failed (attempt %s/%s): %s", method, url, attempt, MAX_RETRIES, exc)
-            time.sleep(1.5 * attempt)
+            if attempt < MAX_RETRIES:
+                time.sleep(_retry_delay(attempt))
 
     if last_res is not None:
         return last_res
@@ -85,12 +102,16 @@ def _wp_v2_urls(base_url: str, endpoint: str) -> list[str]:
 
 def _wp_v2_request(session: requests.Session, method: str, base_url: str, endpoint: str, **kwargs) -> requests.Response:
     last: requests.Response | None = None
-    for url in _wp_v2_urls(base_url, endpoint):
+    urls = list(enumerate(_wp_v2_urls(base_url, endpoint)))
+    preferred = _WORKING_ROUTE.get(base_url, 0)
+    urls.sort(key=lambda pair: pair[0] != preferred)
+    for index, url in urls:
         res = _request_with_retry(session, method, url, **kwargs)
         last = res
         # Try fallback route only when canonical wp-json route is unavailable.
         if res.status_code == 404:
             continue
+        _WORKING_ROUTE[base_url] = index
         return res
     if last is None:
         raise RuntimeError("request failed")
@@ -106,7 +127,7 @@ def _plugin_map(session: requests.Session, base_url: str) -> dict[str, dict]:
 
 def install_plugins(base_url: str, plugins: list[str], apply_changes: bool) -> tuple[int, int]:
     session = requests.Session()
-    session.auth = (cs.WP_USERNAME, cs.WP_APP_PASSWORD)
+    session.auth = cs.wp_credentials()
 
     installed_or_active = 0
     failed = 0
@@ -165,6 +186,15 @@ def install_plugins(base_url: str, plugins: list[str], apply_changes: bool) -> t
     return installed_or_active, failed
 
 
+def _coerce_custom_target(site: str) -> str:
+    """別名に無い --site をURLに変換（URLはそのまま、ホスト名はhttps付与、それ以外はサブドメイン扱い）"""
+    if site.startswith("http://") or site.startswith("https://"):
+        return site
+    if "." in site:
+        return f"https://{site}"
+    return _site_url(site)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Install and activate WordPress plugins across SD sites.")
     parser.add_argument("--site", default="", help="Single subdomain target (e.g. sd01-chichi)")
@@ -177,32 +207,30 @@ def main() -> None:
     parser.add_argument("--apply", action="store_true", help="Actually install/activate. Default is dry-run.")
     args = parser.parse_args()
 
-    plugins = [p.strip() for p in args.plugins.split(",") if p.strip()]
+    plugins = list(dict.fromkeys(p.strip() for p in args.plugins.split(",") if p.strip()))
     if not plugins:
         raise ValueError("plugins is empty")
 
     targets: list[str] = []
     if args.site:
-        key = args.site.strip().lower()
-        resolved = SITE_ALIASES.get(key, args.site.strip())
-        if resolved == "av-kantei.com":
-            targets.append("https://av-kantei.com")
-        elif resolved.startswith("http://") or resolved.startswith("https://"):
-            targets.append(resolved)
-        elif "." in resolved:
-            targets.append(f"https://{resolved}")
-        else:
-            targets.append(f"https://{resolved}.av-kantei.com")
+        site = args.site.strip()
+        targets.append(_URL_BY_KEY.get(site.lower()) or _coerce_custom_target(site))
     else:
-        targets.extend([f"https://{s.subdomain}.av-kantei.com" for s in cs.SITES if s.subdomain.startswith("sd")])
+        targets.extend([_site_url(s.subdomain) for s in cs.SITES if s.subdomain.startswith("sd")])
     if args.include_main:
-        targets.append("https://av-kantei.com")
+        targets.append(MAIN_URL)
+
+    def _run(base_url: str) -> tuple[int, int]:
+        logger.info("=== target: %s (apply=%s) ===", base_url, args.apply)
+        return install_plugins(base_url, plugins, apply_changes=args.apply)
+
+    # サイトごとに別ホストなので並列実行（同一サイト内のプラグイン操作は順番のまま）
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        results = list(executor.map(_run, targets))
 
     ok = 0
     ng = 0
-    for base_url in targets:
-        logger.info("=== target: %s (apply=%s) ===", base_url, args.apply)
-        installed_or_active, failed = install_plugins(base_url, plugins, apply_changes=args.apply)
+    for base_url, (installed_or_active, failed) in zip(targets, results):
         logger.info(
             "%s result: requested=%s ok=%s failed=%s",
             base_url,
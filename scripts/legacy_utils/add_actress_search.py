@@ -1,13 +1,11 @@
 """
 女優検索ウィジェット（控えめ版）
 """
-import sys
-import io
 from wp_client import WPClient
 from config import get_config
+from utils import ensure_utf8_stdout
 
-if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+ensure_utf8_stdout()
 
 def add_actress_search():
     config = get_config()
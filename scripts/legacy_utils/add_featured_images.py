@@ -4,8 +4,13 @@
 """
 import argparse
 import logging
+import logging.handlers
+import queue
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from typing import NamedTuple
 
 from config import get_config
 from wp_client import WPClient
@@ -18,27 +23,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# <img ... src="..."> のsrc抽出用（属性部は非貪欲、`<imgx` などは除外）
+_IMG_SRC_RE = re.compile(r"""<img(?=\s)[^>]*?\ssrc\s*=\s*["']([^"']+)""", re.IGNORECASE)
 
-def get_posts(wp_client: WPClient, status: str = "publish", per_page: int = 100, only_without_featured: bool = False) -> list[dict]:
+
+class PostRow(NamedTuple):
+    """処理に使う項目だけを取り出した投稿"""
+    id: int
+    title: str
+    content: str
+    featured: int
+
+
+def get_posts(wp_client: WPClient, status: str = "publish", per_page: int = 100, only_without_featured: bool = False) -> list[PostRow]:
     """投稿を取得"""
     response = wp_client._request(
         "GET", 
         "posts", 
-        params={"status": status, "per_page": per_page}
+        params={"status": status, "per_page": per_page, "_fields": "id,title,featured_media,content"}
     )
     response.raise_for_status()
-    posts = response.json()
+    # JSONのネストはここで一度だけ辿り、以降は属性アクセスで扱う
+    posts = [
+        PostRow(
+            p["id"],
+            p.get("title", {}).get("rendered", "無題"),
+            p.get("content", {}).get("rendered", ""),
+            p.get("featured_media", 0),
+        )
+        for p in response.json()
+    ]
     
     if only_without_featured:
         # アイキャッチが0（未設定）の投稿のみ返す
-        return [p for p in posts if p.get("featured_media", 0) == 0]
+        return [p for p in posts if p.featured == 0]
     return posts
 
 
 def extract_eyecatch_image_url(content: str) -> str | None:
     """コンテンツから後半の画像URLを抽出（肌の露出が多い画像）"""
-    # imgタグからsrc属性を全て抽出
-    matches = re.findall(r'<img[^>]+src=["\']([^"\']+)["\']', content, re.IGNORECASE)
+    # 選ぶのは最大でも8枚目なので、9件見つかった時点で走査を打ち切る
+    matches = [m.group(1) for m in islice(_IMG_SRC_RE.finditer(content), 9)]
     if matches:
         # 後半の画像を選ぶ（肌露出多め）
         total = len(matches)
@@ -56,6 +81,49 @@ def extract_eyecatch_image_url(content: str) -> str | None:
     return None
 
 
+def _media_stem(url: str) -> str:
+    """URLからファイル名の拡張子前部分を取り出す"""
+    return url.split("/")[-1].split(".")[0]
+
+
+def build_media_index(wp_client: WPClient, stems: set[str], per_page: int = 100) -> dict[str, int]:
+    """メディア一覧を一括取得して ファイル名stem → media_id の辞書を作る
+
+    投稿ごとに media?search= を叩く代わりに、一覧をページ送りで走査する。
+    必要なstemが全て見つかった時点で打ち切る。
+    """
+    index: dict[str, int] = {}
+    if not stems:
+        return index
+    remaining = set(stems)
+    page = 1
+    while remaining:
+        response = wp_client._request(
+            "GET",
+            "media",
+            params={"per_page": per_page, "page": page, "_fields": "id,source_url"},
+        )
+        if response.status_code == 400:
+            # 最終ページを超えた
+            break
+        response.raise_for_status()
+        items = response.json()
+        if not items:
+            break
+        for m in items:
+            stem = _media_stem(m.get("source_url", ""))
+            # 同名が複数ある場合は先に見つかった方（新しい方）を優先
+            if stem and stem not in index:
+                index[stem] = m["id"]
+                remaining.discard(stem)
+        total_pages = int(response.headers.get("X-WP-TotalPages", 0) or 0)
+        if total_pages and page >= total_pages:
+            break
+        page += 1
+    logger.info(f"メディア索引: {len(index)}件（対象stem {len(stems)}件中 {len(stems) - len(remaining)}件一致）")
+    return index
+
+
 def update_featured_media(wp_client: WPClient, post_id: int, media_id: int) -> bool:
     """投稿のアイキャッチ画像を更新"""
     try:
@@ -71,14 +139,78 @@ def update_featured_media(wp_client: WPClient, post_id: int, media_id: int) -> b
         return False
 
 
+def process_post(
+    wp_client: WPClient,
+    image_tools: ImageTools,
+    wp_base_url: str,
+    media_index: dict[str, int],
+    post: PostRow,
+    img_url: str | None,
+) -> bool:
+    """1件の投稿にアイキャッチを設定（スレッドから呼ばれる）"""
+    post_id = post.id
+    title = post.title[:40]
+    
+    if not img_url:
+        logger.warning(f"[{post_id}] 画像が見つかりません: {title}")
+        return False
+    
+    try:
+        # 画像がすでにWP上にある場合はそのメディアIDを取得
+        # 外部URLの場合はダウンロードしてアップロード
+        if wp_base_url in img_url:
+            # すでにWPにある画像 - 事前取得したメディア索引から引く
+            media_id = media_index.get(_media_stem(img_url))
+            
+            if media_id:
+                logger.info(f"[{post_id}] 既存メディア発見: media_id={media_id}")
+            else:
+                # 見つからなければ新規アップロード
+                img_bytes, filename, mime_type = image_tools.download_to_bytes(img_url)
+                result = wp_client.upload_media(file_bytes=img_bytes, filename=filename, mime_type=mime_type)
+                media_id = result["id"]
+                logger.info(f"[{post_id}] 新規アップロード: media_id={media_id}")
+        else:
+            # 外部URL - ダウンロードしてアップロード
+            img_bytes, filename, mime_type = image_tools.download_to_bytes(img_url)
+            result = wp_client.upload_media(file_bytes=img_bytes, filename=filename, mime_type=mime_type)
+            media_id = result["id"]
+            logger.info(f"[{post_id}] 外部画像アップロード: media_id={media_id}")
+        
+        # アイキャッチを設定
+        if update_featured_media(wp_client, post_id, media_id):
+            logger.info(f"[{post_id}] ✅ アイキャッチ設定完了: {title}")
+            return True
+        return False
+            
+    except Exception as e:
+        logger.error(f"[{post_id}] エラー: {e}")
+        return False
+
+
 def main():
     parser = argparse.ArgumentParser(description="既存投稿のアイキャッチを更新")
     parser.add_argument("--status", default="publish", help="対象の投稿ステータス（publish/draft）")
     parser.add_argument("--dry-run", action="store_true", help="実際には更新しない")
     parser.add_argument("--limit", type=int, default=100, help="最大件数")
     parser.add_argument("--all", action="store_true", help="アイキャッチ設定済みの投稿も含めて更新")
+    parser.add_argument("--workers", type=int, default=8, help="並列処理数")
     args = parser.parse_args()
     
+    # 並列処理中のログ出力はキュー投入だけにし、書き出しは別スレッドで行う
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    log_queue = queue.SimpleQueue()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    try:
+        run(args)
+    finally:
+        listener.stop()
+
+
+def run(args: argparse.Namespace) -> None:
     config = get_config()
     wp_client = WPClient(
         base_url=config.wp_base_url,
@@ -99,8 +231,7 @@ def main():
     logger.info(f"対象投稿: {len(posts)}件")
     print("\n" + "=" * 60)
     for i, post in enumerate(posts, 1):
-        title = post.get("title", {}).get("rendered", "無題")
-        print(f"  {i}. [ID:{post['id']}] {title[:50]}")
+        print(f"  {i}. [ID:{post.id}] {post.title[:50]}")
     print("=" * 60 + "\n")
     
     if args.dry_run:
@@ -112,58 +243,34 @@ def main():
         logger.info("キャンセルしました")
         return
     
+    # コンテンツから中盤の画像URL（顔+エロ）を先に抽出し、WP上の画像はまとめて索引化
+    img_urls = {
+        post.id: extract_eyecatch_image_url(post.content)
+        for post in posts
+    }
+    wp_stems = {
+        _media_stem(url) for url in img_urls.values()
+        if url and config.wp_base_url in url
+    }
+    media_index = build_media_index(wp_client, wp_stems)
+    
     success = 0
     fail = 0
-    
-    for post in posts:
-        post_id = post["id"]
-        title = post.get("title", {}).get("rendered", "無題")[:40]
-        content = post.get("content", {}).get("rendered", "")
-        
-        # コンテンツから中盤の画像URL（顔+エロ）を抽出
-        img_url = extract_eyecatch_image_url(content)
-        if not img_url:
-            logger.warning(f"[{post_id}] 画像が見つかりません: {title}")
-            fail += 1
-            continue
-        
-        try:
-            # 画像がすでにWP上にある場合はそのメディアIDを取得
-            # 外部URLの場合はダウンロードしてアップロード
-            if config.wp_base_url in img_url:
-                # すでにWPにある画像 - メディアを検索
-                logger.info(f"[{post_id}] WP画像検出、メディア検索中...")
-                # ファイル名でメディアを検索
-                filename = img_url.split("/")[-1]
-                response = wp_client._request("GET", "media", params={"search": filename.split(".")[0]})
-                media_list = response.json()
-                
-                if media_list:
-                    media_id = media_list[0]["id"]
-                    logger.info(f"[{post_id}] 既存メディア発見: media_id={media_id}")
-                else:
-                    # 見つからなければ新規アップロード
-                    img_bytes, filename, mime_type = image_tools.download_to_bytes(img_url)
-                    result = wp_client.upload_media(file_bytes=img_bytes, filename=filename, mime_type=mime_type)
-                    media_id = result["id"]
-                    logger.info(f"[{post_id}] 新規アップロード: media_id={media_id}")
-            else:
-                # 外部URL - ダウンロードしてアップロード
-                img_bytes, filename, mime_type = image_tools.download_to_bytes(img_url)
-                result = wp_client.upload_media(file_bytes=img_bytes, filename=filename, mime_type=mime_type)
-                media_id = result["id"]
-                logger.info(f"[{post_id}] 外部画像アップロード: media_id={media_id}")
-            
-            # アイキャッチを設定
-            if update_featured_media(wp_client, post_id, media_id):
-                logger.info(f"[{post_id}] ✅ アイキャッチ設定完了: {title}")
+
+    # 投稿ごとのHTTP往復（DL/アップロード/更新）を並列化
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as executor:
+        futures = [
+            executor.submit(
+                process_post, wp_client, image_tools, config.wp_base_url,
+                media_index, post, img_urls[post.id],
+            )
+            for post in posts
+        ]
+        for future in as_completed(futures):
+            if future.result():
                 success += 1
             else:
                 fail += 1
-                
-        except Exception as e:
-            logger.error(f"[{post_id}] エラー: {e}")
-            fail += 1
     
     print("\n" + "=" * 60)
     print(f"✅ 処理完了! 成功: {success}件 / 失敗: {fail}件")
@@ -1,14 +1,11 @@
 """
 WordPressメニュー項目追加スクリプト（改良版）
 """
-import sys
-import io
 from wp_client import WPClient
 from config import get_config
+from utils import ensure_utf8_stdout
 
-# Windows環境での文字化け対策
-if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+ensure_utf8_stdout()
 
 def add_menu_item():
     config = get_config()
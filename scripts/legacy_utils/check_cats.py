@@ -1,12 +1,10 @@
 from wp_client import WPClient
 from config import get_config
+from utils import ensure_utf8_stdout
 
-import sys
-import io
+ensure_utf8_stdout()
 
 def check_categories():
-    if sys.platform == "win32":
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     config = get_config()
     wp = WPClient(config.wp_base_url, config.wp_username, config.wp_app_password)
     cats = wp.get_categories()
@@ -1,11 +1,11 @@
-import sys
-import io
+from concurrent.futures import ThreadPoolExecutor
 from wp_client import WPClient
 from config import get_config
+from utils import ensure_utf8_stdout
+
+ensure_utf8_stdout()
 
 def debug_posts():
-    if sys.platform == "win32":
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     config = get_config()
     wp = WPClient(config.wp_base_url, config.wp_username, config.wp_app_password)
     
@@ -13,16 +13,23 @@ def debug_posts():
     cats = wp.get_categories()
     cat_map = {c['name']: c['id'] for c in cats}
     
-    for name in target_categories:
-        cat_id = cat_map.get(name)
-        if not cat_id:
-            print(f"Category {name} not found")
-            continue
-            
-        posts = wp._request('GET', 'posts', params={'categories': cat_id, 'status': 'publish', 'per_page': 10}).json()
-        print(f"\n--- Category: {name} (ID: {cat_id}) ---")
-        for p in posts:
-            print(f"ID: {p['id']}, Categories: {p['categories']}, Title: {p['title']['rendered']}")
+    def fetch(cat_id):
+        return wp._request('GET', 'posts', params={'categories': cat_id, 'status': 'publish', 'per_page': 10, '_fields': 'id,title,categories'}).json()
+
+    # カテゴリごとの取得は並列に行い、表示は元の順番で
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = {name: executor.submit(fetch, cat_map[name]) for name in target_categories if cat_map.get(name)}
+
+        for name in target_categories:
+            cat_id = cat_map.get(name)
+            if not cat_id:
+                print(f"Category {name} not found")
+                continue
+
+            posts = futures[name].result()
+            print(f"\n--- Category: {name} (ID: {cat_id}) ---")
+            for p in posts:
+                print(f"ID: {p['id']}, Categories: {p['categories']}, Title: {p['title']['rendered']}")
 
 if __name__ == "__main__":
     debug_posts()
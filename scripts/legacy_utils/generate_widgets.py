@@ -2,18 +2,43 @@
 サイドバー用画像付きカテゴリウィジェットHTML生成スクリプト
 """
 import logging
-import sys
-import io
+from concurrent.futures import ThreadPoolExecutor
+from html import escape, unescape
+from string import Template
 from wp_client import WPClient
 from config import get_config
+from utils import ensure_utf8_stdout
 
-# Windows環境での文字化け対策
-if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+ensure_utf8_stdout()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 記事1件分のHTML（モジュール読み込み時に一度だけ組み立てる）
+# 値はすべて呼び出し側で html.escape 済みのものを渡す
+_RECENT_ITEM_TPL = Template('''    <li style="display:flex;gap:10px;margin-bottom:15px;align-items:flex-start;">
+      <a href="$link" style="flex:0 0 100px;display:block;">
+        <img src="$thumb_url" style="width:100px;height:70px;object-fit:cover;border-radius:6px;box-shadow:0 3px 6px rgba(0,0,0,0.15);">
+      </a>
+      <div style="flex:1;">
+        <a href="$link" style="font-size:14px;line-height:1.4;text-decoration:none;color:#333;font-weight:bold;display:-webkit-box;-webkit-line-clamp:3;-webkit-box-orient:vertical;overflow:hidden;">
+          $title
+        </a>
+      </div>
+    </li>\n''')
+
+_CATEGORY_ITEM_TPL = Template('''    <li style="display:flex;gap:10px;margin-bottom:12px;align-items:center;">
+      <a href="$link" style="flex:0 0 80px;display:block;">
+        <img src="$thumb_url" style="width:80px;height:60px;object-fit:cover;border-radius:4px;box-shadow:0 2px 5px rgba(0,0,0,0.1);">
+      </a>
+      <a href="$link" style="font-size:13px;line-height:1.4;text-decoration:none;color:#333;font-weight:bold;overflow:hidden;text-overflow:ellipsis;display:-webkit-box;-webkit-line-clamp:2;-webkit-box-orient:vertical;">
+        $title
+      </a>
+    </li>\n''')
+
+# サイドバーのカテゴリブロックごとに付ける区切り線
+_WIDGET_SEP = "\n<hr style='border:0;border-top:1px dashed #eee;margin:25px 0;'>\n"
+
 def generate_footer_home_link_html(base_url: str):
     """
     フッターなどに設置するシンプルな「ホーム」リンクを生成
@@ -25,13 +50,37 @@ def generate_footer_home_link_html(base_url: str):
 </div>\n'''
     return html
 
+def fetch_thumb_urls(wp_client: WPClient, posts: list) -> dict:
+    """
+    表示する投稿のアイキャッチ(medium)URLを media?include= の1リクエストでまとめて取得
+    """
+    media_ids = [p['featured_media'] for p in posts if p.get('featured_media')]
+    if not media_ids:
+        return {}
+    try:
+        response = wp_client._request("GET", "media", params={
+            "include": ",".join(map(str, media_ids)),
+            "per_page": len(media_ids),
+            "_fields": "id,source_url,media_details",
+        })
+        media_list = response.json()
+    except Exception:
+        return {}
+    if not isinstance(media_list, list):
+        return {}
+    return {
+        m['id']: m.get('media_details', {}).get('sizes', {}).get('medium', {}).get('source_url', m.get('source_url', ""))
+        for m in media_list
+    }
+
 def generate_recent_posts_html(wp_client: WPClient, displayed_post_ids: set, count: int = 5):
     """
     全カテゴリの最新記事からサイドバー用HTMLを生成
     """
     params = {
         "per_page": count + 10, # 重複でスキップされる分を見越して多めに取得
-        "status": "publish"
+        "status": "publish",
+        "_fields": "id,title,link,featured_media",
     }
     response = wp_client._request("GET", "posts", params=params)
     posts = response.json()
@@ -39,13 +88,15 @@ def generate_recent_posts_html(wp_client: WPClient, displayed_post_ids: set, cou
     if not posts:
         return ""
 
-    html = f'<div class="widget-recent-posts">\n'
-    html += f'  <h3 class="widget-title" style="font-size:16px;margin-bottom:15px;border-bottom:2px solid #333;padding-bottom:5px;">✨ 最新の記事</h3>\n'
-    html += f'  <ul style="list-style:none;padding:0;margin:0;">\n'
+    parts: list[str] = []
+    parts.append(f'<div class="widget-recent-posts">\n')
+    parts.append(f'  <h3 class="widget-title" style="font-size:16px;margin-bottom:15px;border-bottom:2px solid #333;padding-bottom:5px;">✨ 最新の記事</h3>\n')
+    parts.append(f'  <ul style="list-style:none;padding:0;margin:0;">\n')
 
-    added_count = 0
+    # 先に表示する投稿を決めてから、サムネイルをまとめて取得
+    selected = []
     for post in posts:
-        if added_count >= count:
+        if len(selected) >= count:
             break
             
         post_id = post['id']
@@ -53,46 +104,25 @@ def generate_recent_posts_html(wp_client: WPClient, displayed_post_ids: set, cou
             continue
             
         displayed_post_ids.add(post_id)
-        added_count += 1
-        
-        title = post['title']['rendered']
-        link = post['link']
-        thumb_url = ""
-        
-        featured_media = post.get('featured_media')
-        if featured_media:
-            try:
-                media = wp_client.get_media(featured_media)
-                thumb_url = media['media_details']['sizes'].get('medium', {}).get('source_url', media['source_url'])
-            except: pass
-
-        html += f'''    <li style="display:flex;gap:10px;margin-bottom:15px;align-items:flex-start;">
-      <a href="{link}" style="flex:0 0 100px;display:block;">
-        <img src="{thumb_url}" style="width:100px;height:70px;object-fit:cover;border-radius:6px;box-shadow:0 3px 6px rgba(0,0,0,0.15);">
-      </a>
-      <div style="flex:1;">
-        <a href="{link}" style="font-size:14px;line-height:1.4;text-decoration:none;color:#333;font-weight:bold;display:-webkit-box;-webkit-line-clamp:3;-webkit-box-orient:vertical;overflow:hidden;">
-          {title}
-        </a>
-      </div>
-    </li>\n'''
+        selected.append(post)
+    thumb_urls = fetch_thumb_urls(wp_client, selected)
 
-    html += f'  </ul>\n'
-    html += f'</div>\n'
-    return html
+    for post in selected:
+        # rendered は実体参照を含むので一度戻してから正規化してエスケープ（二重エスケープ防止）
+        title = escape(unescape(post['title']['rendered']))
+        link = escape(post['link'])
+        thumb_url = escape(thumb_urls.get(post.get('featured_media'), ""))
+
+        parts.append(_RECENT_ITEM_TPL.substitute(link=link, thumb_url=thumb_url, title=title))
 
-def generate_widget_html(wp_client: WPClient, category_name: str, displayed_post_ids: set, count: int = 3):
+    parts.append(f'  </ul>\n')
+    parts.append(f'</div>\n')
+    return "".join(parts)
+
+def generate_widget_html(wp_client: WPClient, category_name: str, cat_id: int | None, displayed_post_ids: set, count: int = 3):
     """
     指定したカテゴリの最新記事からサイドバー用HTMLを生成
     """
-    # カテゴリIDを取得
-    cats = wp_client.get_categories()
-    cat_id = None
-    for c in cats:
-        if c['name'] == category_name:
-            cat_id = c['id']
-            break
-    
     if not cat_id:
         # 見つからない場合は作成せずにスキップ
         return ""
@@ -101,7 +131,8 @@ def generate_widget_html(wp_client: WPClient, category_name: str, displayed_post
     params = {
         "categories": cat_id,
         "per_page": count + 5, # 重複でスキップされる分を見越して多めに取得
-        "status": "publish"
+        "status": "publish",
+        "_fields": "id,title,link,featured_media",
     }
     response = wp_client._request("GET", "posts", params=params)
     posts = response.json()
@@ -109,45 +140,29 @@ def generate_widget_html(wp_client: WPClient, category_name: str, displayed_post
     if not posts:
         return ""
 
-    html = f'<div class="widget-category-posts" style="margin-top:30px;">\n'
-    html += f'  <h3 class="widget-title" style="font-size:16px;margin-bottom:12px;border-bottom:2px solid #e60000;padding-bottom:5px;">📂 {category_name}まとめ</h3>\n'
-    html += f'  <ul style="list-style:none;padding:0;margin:0;">\n'
+    parts: list[str] = []
+    parts.append(f'<div class="widget-category-posts" style="margin-top:30px;">\n')
+    parts.append(f'  <h3 class="widget-title" style="font-size:16px;margin-bottom:12px;border-bottom:2px solid #e60000;padding-bottom:5px;">📂 {escape(category_name)}まとめ</h3>\n')
+    parts.append(f'  <ul style="list-style:none;padding:0;margin:0;">\n')
 
-    added_count = 0
-    for post in posts:
-        if added_count >= count:
-            break
-            
-        # フォルダ内での重複は避けるが、他フォルダとの重複は許容する（ユーザー要望：VRはここ、美少女はここ）
-        # ただし同じフォルダ内に同じ記事が出ることはWPのクエリ的に無いはず
-        
-        added_count += 1
-
-        title = post['title']['rendered']
-        link = post['link']
-        thumb_url = ""
-        
-        featured_media = post.get('featured_media')
-        if featured_media:
-            try:
-                media = wp_client.get_media(featured_media)
-                thumb_url = media['media_details']['sizes'].get('medium', {}).get('source_url', media['source_url'])
-            except: pass
-
-        html += f'''    <li style="display:flex;gap:10px;margin-bottom:12px;align-items:center;">
-      <a href="{link}" style="flex:0 0 80px;display:block;">
-        <img src="{thumb_url}" style="width:80px;height:60px;object-fit:cover;border-radius:4px;box-shadow:0 2px 5px rgba(0,0,0,0.1);">
-      </a>
-      <a href="{link}" style="font-size:13px;line-height:1.4;text-decoration:none;color:#333;font-weight:bold;overflow:hidden;text-overflow:ellipsis;display:-webkit-box;-webkit-line-clamp:2;-webkit-box-orient:vertical;">
-        {title}
-      </a>
-    </li>\n'''
+    # フォルダ内での重複は避けるが、他フォルダとの重複は許容する（ユーザー要望：VRはここ、美少女はここ）
+    # ただし同じフォルダ内に同じ記事が出ることはWPのクエリ的に無いはず
+    selected = posts[:count]
+    thumb_urls = fetch_thumb_urls(wp_client, selected)
 
-    html += f'  </ul>\n'
-    html += f'  <a href="{wp_client.base_url}/category/{category_name}/" style="display:block;text-align:right;font-size:12px;color:#666;text-decoration:none;margin-top:5px;">もっと見る →</a>\n'
-    html += f'</div>\n'
+    for post in selected:
+        # rendered は実体参照を含むので一度戻してから正規化してエスケープ（二重エスケープ防止）
+        title = escape(unescape(post['title']['rendered']))
+        link = escape(post['link'])
+        thumb_url = escape(thumb_urls.get(post.get('featured_media'), ""))
+
+        parts.append(_CATEGORY_ITEM_TPL.substitute(link=link, thumb_url=thumb_url, title=title))
+
+    parts.append(f'  </ul>\n')
+    parts.append(f'  <a href="{wp_client.base_url}/category/{escape(category_name)}/" style="display:block;text-align:right;font-size:12px;color:#666;text-decoration:none;margin-top:5px;">もっと見る →</a>\n')
+    parts.append(f'</div>\n')
     
-    return html
+    return "".join(parts)
 
 def main():
     config = get_config()
@@ -168,12 +183,17 @@ def main():
     footer_html = generate_footer_home_link_html(config.wp_base_url)
     
     # 2. サイドバー用まとめ（フォルダ形式）
-    sidebar_html = ""
     target_categories = ["VR作品", "素人・ナンパ", "熟女・人妻", "美少女・若手", "巨乳・爆乳"]
-    for cat in target_categories:
-        html = generate_widget_html(wp_client, cat, displayed_post_ids)
-        if html:
-            sidebar_html += html + "\n<hr style='border:0;border-top:1px dashed #eee;margin:25px 0;'>\n"
+    # カテゴリ名→IDは一度だけ作る
+    cat_index = {c['name']: c['id'] for c in wp_client.get_categories()}
+    # カテゴリごとの取得（記事一覧+サムネイル）は独立しているので並列実行し、結果は元の順で連結
+    # ※ generate_widget_html はカテゴリ間の重複を許容するため displayed_post_ids は更新しない
+    with ThreadPoolExecutor(max_workers=len(target_categories)) as executor:
+        results = list(executor.map(
+            lambda cat: generate_widget_html(wp_client, cat, cat_index.get(cat), displayed_post_ids),
+            target_categories,
+        ))
+    sidebar_html = "".join(html + _WIDGET_SEP for html in results if html)
     
     print("\n--- 【A】フッター用ホームリンク（フッターエリアに設置） ---")
     print(footer_html)
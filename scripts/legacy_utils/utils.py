@@ -0,0 +1,17 @@
+"""
+レガシースクリプト共通ユーティリティ
+"""
+import sys
+
+_stdout_configured = False
+
+
+def ensure_utf8_stdout() -> None:
+    """Windows環境での文字化け対策（標準出力をUTF-8にする。何度呼んでも一度だけ）"""
+    global _stdout_configured
+    if _stdout_configured:
+        return
+    _stdout_configured = True
+    if sys.platform == "win32" and hasattr(sys.stdout, "reconfigure"):
+        # TextIOWrapperを作り直さず、既存ストリームのエンコーディングだけ切り替える
+        sys.stdout.reconfigure(encoding="utf-8")
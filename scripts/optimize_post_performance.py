@@ -156,7 +156,7 @@ def optimize_content(content: str) -> tuple[str, bool]:
 
 def update_site(base_url: str, statuses: list[str], apply_changes: bool, limit: int | None = None) -> None:
     session = requests.Session()
-    session.auth = (cs.WP_USERNAME, cs.WP_APP_PASSWORD)
+    session.auth = cs.wp_credentials()
 
     scanned = 0
     updated = 0
@@ -7,6 +7,7 @@ import os
 import re
 import sys
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -250,6 +251,41 @@ def _build_site_queue(
     return q
 
 
+def _publish_item(wp: WPClient, item: QueueItem, dry_run: bool) -> dict[str, Any]:
+    row = {
+        "site": item.site,
+        "post_id": item.post_id,
+        "slug": item.slug,
+        "url_before": item.url_before,
+        "status_before": item.status_before,
+        "action": "skipped",
+        "reason": "",
+        "updated_at": _now_utc_iso(),
+    }
+
+    if item.status_before != "draft":
+        row["action"] = "skipped"
+        row["reason"] = f"status_is_{item.status_before}"
+    elif dry_run:
+        row["action"] = "skipped"
+        row["reason"] = "dry_run"
+    else:
+        try:
+            latest = wp.get_post(item.post_id)
+            latest_status = str(latest.get("status", "") or "")
+            if latest_status != "draft":
+                row["action"] = "skipped"
+                row["reason"] = f"status_changed_to_{latest_status}"
+            else:
+                wp.update_post(item.post_id, {"status": "publish"})
+                row["action"] = "updated"
+                row["reason"] = ""
+        except Exception as exc:  # noqa: BLE001
+            row["action"] = "failed"
+            row["reason"] = str(exc)
+    return row
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Publish SD draft posts now (draft -> publish).")
     parser.add_argument("--sites", type=str, default="all")
@@ -260,6 +296,7 @@ def main() -> None:
     parser.add_argument("--dry-run", action="store_true")
     parser.add_argument("--reset-progress", action="store_true")
     parser.add_argument("--output-dir", type=str, default="data/publish_sd_drafts")
+    parser.add_argument("--workers", type=int, default=5, help="concurrent publish requests")
     args = parser.parse_args()
 
     if args.max_pages <= 0:
@@ -323,10 +360,11 @@ def main() -> None:
 
     max_items = int(args.max_items or 0)
     run_entries: list[dict[str, Any]] = list(init_entries)
-    assigned = 0
 
+    # Round-robin across sites decides the order up front; publishing itself runs concurrently.
+    assignments: list[QueueItem] = []
     while cycle_sites:
-        if max_items > 0 and assigned >= max_items:
+        if max_items > 0 and len(assignments) >= max_items:
             break
         site_id = cycle_sites[0]
         queue = site_queues[site_id]
@@ -334,40 +372,21 @@ def main() -> None:
             cycle_sites.popleft()
             continue
 
-        item = queue.popleft()
-        row = {
-            "site": item.site,
-            "post_id": item.post_id,
-            "slug": item.slug,
-            "url_before": item.url_before,
-            "status_before": item.status_before,
-            "action": "skipped",
-            "reason": "",
-            "updated_at": _now_utc_iso(),
-        }
-
-        if item.status_before != "draft":
-            row["action"] = "skipped"
-            row["reason"] = f"status_is_{item.status_before}"
-        elif args.dry_run:
-            row["action"] = "skipped"
-            row["reason"] = "dry_run"
-        else:
-            wp = site_clients[site_id]
-            try:
-                latest = wp.get_post(item.post_id)
-                latest_status = str(latest.get("status", "") or "")
-                if latest_status != "draft":
-                    row["action"] = "skipped"
-                    row["reason"] = f"status_changed_to_{latest_status}"
-                else:
-                    wp.update_post(item.post_id, {"status": "publish"})
-                    row["action"] = "updated"
-                    row["reason"] = ""
-            except Exception as exc:  # noqa: BLE001
-                row["action"] = "failed"
-                row["reason"] = str(exc)
+        assignments.append(queue.popleft())
+        cycle_sites.rotate(-1)
+        if not site_queues[site_id]:
+            while cycle_sites and cycle_sites[0] == site_id:
+                cycle_sites.popleft()
+            if site_id in cycle_sites:
+                cycle_sites.remove(site_id)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        rows = list(executor.map(
+            lambda item: _publish_item(site_clients[item.site], item, bool(args.dry_run)),
+            assignments,
+        ))
 
+    for item, row in zip(assignments, rows):
         run_entries.append(row)
         should_mark_processed = (
             row["action"] == "updated"
@@ -376,20 +395,12 @@ def main() -> None:
         if should_mark_processed:
             progress["processed_post_ids"].append(item.post_id)
         if row["action"] == "updated":
-            progress["last_published_at"] = _now_utc_iso()
+            progress["last_published_at"] = row["updated_at"]
             progress["total_published"] = int(progress.get("total_published", 0) or 0) + 1
             per_site = progress.get("per_site_published", {})
-            per_site[site_id] = int(per_site.get(site_id, 0) or 0) + 1
+            per_site[item.site] = int(per_site.get(item.site, 0) or 0) + 1
             progress["per_site_published"] = per_site
 
-        assigned += 1
-        cycle_sites.rotate(-1)
-        if not site_queues[site_id]:
-            while cycle_sites and cycle_sites[0] == site_id:
-                cycle_sites.popleft()
-            if site_id in cycle_sites:
-                cycle_sites.remove(site_id)
-
     _save_progress(output_dir, progress)
     _save_manifest(
         output_dir,
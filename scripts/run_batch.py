@@ -8,8 +8,9 @@ import time
 import io
 import random
 from types import SimpleNamespace
+from typing import Iterator
 from datetime import datetime, timedelta, timezone
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from pathlib import Path
 
@@ -17,6 +18,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from src.core.config import get_config
+from src.core.log_queue import start_queue_logging
 from src.clients.fanza import FanzaClient
 from src.clients.wordpress import WPClient
 from src.clients.openai import OpenAIClient
@@ -45,6 +47,8 @@ def setup_logging(level: str) -> None:
             logging.FileHandler("fanza_bot.log", encoding="utf-8"),
         ],
     )
+    # 並列処理中のログ出力で待たされないよう、出力は別スレッドに任せる
+    start_queue_logging()
 
 def _parse_iso_dt(value: str) -> datetime | None:
     try:
@@ -71,7 +75,7 @@ def sync_wp_cache(
         if last_sync:
             after_dt = last_sync - timedelta(hours=overlap_hours)
             after = after_dt.isoformat()
-            logger.info(f"WP同期: 増分同期 after={after} (last_sync={last_sync_raw})")
+            logger.info("WP同期: 増分同期 after=%s (last_sync=%s)", after, last_sync_raw)
         else:
             logger.warning("WP同期: last_syncが不正なためフル同期に切り替えます")
 
@@ -95,7 +99,33 @@ def sync_wp_cache(
 
     inserted = dedupe_store.bulk_mark_posted(items, status="published")
     dedupe_store.set_meta("wp_last_sync_at", datetime.now(timezone.utc).isoformat())
-    logger.info(f"WP同期完了: scanned={posts_scanned}, cached={len(items)}, inserted={inserted}")
+    logger.info("WP同期完了: scanned=%s, cached=%s, inserted=%s", posts_scanned, len(items), inserted)
+
+# FANZA検索の1ページあたり件数（APIのhits上限）
+FANZA_PAGE_SIZE = 100
+# FANZA検索の先読みページ数（1ページ目で候補が揃うことが多いので控えめに）
+FETCH_PREFETCH_PAGES = 2
+
+def iter_fanza_pages(
+    fanza_client: FanzaClient,
+    keyword: str | None,
+    since: str | None,
+    sort: str,
+    max_pages: int,
+) -> Iterator[list[dict]]:
+    """FANZA検索結果をページ順に返す（次ページ以降を並列に先読みし、空ページで終了）"""
+    def fetch_page(page: int) -> list[dict]:
+        return fanza_client.fetch(
+            limit=FANZA_PAGE_SIZE, since=since, sort=sort, keyword=keyword, offset=page * FANZA_PAGE_SIZE,
+        )
+
+    prefetch = max(1, min(FETCH_PREFETCH_PAGES, max_pages))
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        for start in range(0, max_pages, prefetch):
+            for batch in executor.map(fetch_page, range(start, min(start + prefetch, max_pages))):
+                if not batch:
+                    return
+                yield batch
 
 def main():
     parser = argparse.ArgumentParser(description="FANZA → WordPress 自動記事投稿")
@@ -110,6 +140,7 @@ def main():
     parser.add_argument("--sync-overlap-hours", type=int, default=6)
     parser.add_argument("--sync-max-pages", type=int, default=0, help="WP同期の最大ページ(0で無制限)")
     parser.add_argument("--fetch-max-pages", type=int, default=10, help="FANZA取得の最大ページ")
+    parser.add_argument("--workers", type=int, default=3, help="並列に処理する商品数 (1で逐次)")
     args = parser.parse_args()
     
     setup_logging(args.log_level)
@@ -129,26 +160,32 @@ def main():
         resolved_subdomain = subdomain_alias.get(args.subdomain, args.subdomain)
         site_info = get_site_config(resolved_subdomain)
         if site_info:
-            logger.info(f"サイト設定適用: {site_info.title} ({resolved_subdomain})")
+            logger.info("サイト設定適用: %s (%s)", site_info.title, resolved_subdomain)
             config.wp_base_url = f"https://{resolved_subdomain}.av-kantei.com"
             # Use multiple keywords by cycling, instead of AND search
             keyword_list = [kw for kw in site_info.keywords if kw]
             if keyword_list:
-                logger.info(f"???????: {' '.join(keyword_list)}")
+                logger.info("???????: %s", ' '.join(keyword_list))
             else:
                 site_keywords = None
         else:
-            logger.error(f"サブドメイン {resolved_subdomain} の設定が見つかりません。")
+            logger.error("サブドメイン %s の設定が見つかりません。", resolved_subdomain)
             sys.exit(1)
     
     # アフィリエイトIDの決定
     affiliate_id = config.fanza_affiliate_id
     if site_info and site_info.affiliate_id:
         affiliate_id = site_info.affiliate_id
-        logger.info(f"サイト固有のアフィリエイトIDを使用: {affiliate_id}")
+        logger.info("サイト固有のアフィリエイトIDを使用: %s", affiliate_id)
 
     fanza_client = FanzaClient(config.fanza_api_key, affiliate_id)
-    llm_client = OpenAIClient(config.openai_api_key, config.openai_model, config.prompts_dir, config.base_dir / "viewpoints.json")
+    llm_client = OpenAIClient(
+        config.openai_api_key,
+        config.openai_model,
+        config.prompts_dir,
+        config.base_dir / "viewpoints.json",
+        cache_dir=config.data_dir / "llm_cache",
+    )
     wp_client = WPClient(config.wp_base_url, config.wp_username, config.wp_app_password)
     renderer = Renderer(config.base_dir / "layout_premium")
     dedupe_key = args.dedupe_key.strip() or resolved_subdomain or "default"
@@ -160,100 +197,79 @@ def main():
     poster_service = PosterService(config, fanza_client, wp_client, llm_client, renderer, dedupe_store, image_tools)
     
     logger.info("=" * 60)
-    logger.info(f"開始: limit={args.limit}, dry_run={args.dry_run}, site={dedupe_key}")
+    logger.info("開始: limit=%s, dry_run=%s, site=%s", args.limit, args.dry_run, dedupe_key)
     
-    sync_max_pages = None if args.sync_max_pages <= 0 else args.sync_max_pages
-    sync_wp_cache(
-        wp_client,
-        dedupe_store,
-        logger,
-        force_full=args.sync_full,
-        overlap_hours=args.sync_overlap_hours,
-        max_pages=sync_max_pages,
-    )
+    # 例外で終わった場合もWALを本体DBへ書き戻す（ワークフローは.sqlite3本体だけをコミットする）
+    try:
+        sync_max_pages = None if args.sync_max_pages <= 0 else args.sync_max_pages
+        sync_wp_cache(
+            wp_client,
+            dedupe_store,
+            logger,
+            force_full=args.sync_full,
+            overlap_hours=args.sync_overlap_hours,
+            max_pages=sync_max_pages,
+        )
 
-    # 候補取得
-    target_count = args.limit
-    candidate_pool_size = max(target_count * 5, 80)
-    all_items = []
+        # 候補取得
+        target_count = args.limit
+        candidate_pool_size = max(target_count * 5, 80)
+        all_items = []
     
-    seen_pids: set[str] = set()
+        seen_pids: set[str] = set()
     
-    page = 0
-    max_fetch_pages = max(args.fetch_max_pages, 1)
-    if keyword_list:
-        for kw in keyword_list:
-            page = 0
-            while len(all_items) < candidate_pool_size and page < max_fetch_pages:
-                batch = fanza_client.fetch(
-                    limit=100,
-                    since=args.since,
-                    sort=args.sort,
-                    keyword=kw,
-                    offset=page * 100,
-                )
-                if not batch:
+        max_fetch_pages = max(args.fetch_max_pages, 1)
+        for kw in keyword_list or [site_keywords]:
+            for batch in iter_fanza_pages(fanza_client, kw, args.since, args.sort, max_fetch_pages):
+                batch_pids = [str(item['product_id']).lower() for item in batch]
+                # 既出・投稿済みの除外は集合演算でまとめて行い、ページ内の並びは保ったまま追加する
+                new_pids = set(batch_pids).difference(seen_pids, dedupe_store.is_posted_many(batch_pids))
+                seen_pids.update(batch_pids)
+                fresh = [item for pid, item in dict(zip(batch_pids, batch)).items() if pid in new_pids]
+                all_items.extend(fresh[:candidate_pool_size - len(all_items)])
+                if len(all_items) >= candidate_pool_size:
                     break
-                for item in batch:
-                    pid = item['product_id']
-                    pid_norm = str(pid).lower()
-                    if pid_norm in seen_pids:
-                        continue
-                    seen_pids.add(pid_norm)
-                    if not dedupe_store.is_posted(pid_norm):
-                        all_items.append(item)
-                    if len(all_items) >= candidate_pool_size:
-                        break
-                page += 1
             if len(all_items) >= candidate_pool_size:
                 break
-    else:
-        while len(all_items) < candidate_pool_size and page < max_fetch_pages:
-            batch = fanza_client.fetch(
-                limit=100,
-                since=args.since,
-                sort=args.sort,
-                keyword=site_keywords,
-                offset=page * 100,
-            )
-            if not batch:
-                break
-            for item in batch:
-                pid = item['product_id']
-                pid_norm = str(pid).lower()
-                if pid_norm in seen_pids:
-                    continue
-                seen_pids.add(pid_norm)
-                if not dedupe_store.is_posted(pid_norm):
-                    all_items.append(item)
-                if len(all_items) >= candidate_pool_size:
-                    break
-            page += 1
-    random.shuffle(all_items)
-    items = all_items[:target_count]
-    logger.info(f"処理対象: {len(items)}件 (候補プール: {len(all_items)}件からランダム選定)")
+        random.shuffle(all_items)
+        items = all_items[:target_count]
+        logger.info("処理対象: %s件 (候補プール: %s件からランダム選定)", len(items), len(all_items))
     
-    success_count = 0
-    fail_count = 0
-    skip_count = 0
+        success_count = 0
+        fail_count = 0
+        skip_count = 0
     
-    with tqdm(total=len(items), desc="全体進捗", unit="件") as pbar:
-        for idx, item in enumerate(items, 1):
-            pbar.set_postfix_str(f"処理中: {item['product_id']}")
-            try:
-                res = poster_service.process_item(idx, len(items), item, dry_run=args.dry_run, site_info=site_info if args.subdomain else None)
-                if res == "success":
-                    success_count += 1
-                elif res == "skip":
-                    skip_count += 1
-                else:
+        # 商品ごとの処理はAI生成・画像転送・WP投稿の待ち時間が大半なので、複数件をスレッドで重ねる
+        # （DedupeStore/WPClientはスレッド間で共有可能）
+        run_site_info = site_info if args.subdomain else None
+        workers = max(1, min(args.workers, len(items) or 1))
+        with tqdm(total=len(items), desc="全体進捗", unit="件") as pbar, ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    poster_service.process_item, idx, len(items), item,
+                    dry_run=args.dry_run, site_info=run_site_info,
+                ): item
+                for idx, item in enumerate(items, 1)
+            }
+            for future in as_completed(futures):
+                item = futures[future]
+                pbar.set_postfix_str(f"完了: {item['product_id']}")
+                try:
+                    res = future.result()
+                    if res == "success":
+                        success_count += 1
+                    elif res == "skip":
+                        skip_count += 1
+                    else:
+                        fail_count += 1
+                except Exception as e:
+                    logger.error("予期せぬエラー: %s - %s", item['product_id'], e)
                     fail_count += 1
-            except Exception as e:
-                logger.error(f"予期せぬエラー: {item['product_id']} - {e}")
-                fail_count += 1
-            pbar.update(1)
-            
-    logger.info(f"結果: 成功={success_count}, 失敗={fail_count}, スキップ={skip_count}")
+                pbar.update(1)
+        logger.info("結果: 成功=%s, 失敗=%s, スキップ=%s", success_count, fail_count, skip_count)
+    finally:
+        poster_service.close()
+        dedupe_store.close()
 
 if __name__ == "__main__":
     main()
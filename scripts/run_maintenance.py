@@ -5,7 +5,6 @@
 """
 import logging
 import sys
-import io
 from pathlib import Path
 
 # プロジェクトルートをパスに追加
@@ -18,8 +17,8 @@ from src.services.maintenance import MaintenanceService
 
 # Windows環境での文字化け対策
 if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
 
 logging.basicConfig(
     level=logging.INFO,
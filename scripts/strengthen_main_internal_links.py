@@ -174,7 +174,7 @@ def ensure_block(content: str, block: str) -> str:
 
 def main() -> None:
     session = requests.Session()
-    session.auth = (cs.WP_USERNAME, cs.WP_APP_PASSWORD)
+    session.auth = cs.wp_credentials()
 
     raw_posts = fetch_posts(session)
     cat_map = fetch_categories(session)
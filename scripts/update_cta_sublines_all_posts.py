@@ -100,7 +100,7 @@ def _iter_posts(session: requests.Session, base_url: str, search: str | None = N
 def update_site(subdomain: str, search: str | None = None) -> None:
     base_url = f"https://{subdomain}.av-kantei.com"
     session = requests.Session()
-    session.auth = (cs.WP_USERNAME, cs.WP_APP_PASSWORD)
+    session.auth = cs.wp_credentials()
 
     updated = 0
     checked = 0
@@ -17,8 +17,6 @@ from scripts import configure_sites as cs
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
-USER = cs.WP_USERNAME
-APP = cs.WP_APP_PASSWORD
 
 DISCLAIMER_HTML = (
     '<div class="adult-disclaimer" '
@@ -34,7 +32,8 @@ DISCLAIMER_HTML = (
 def _auth_headers() -> dict:
     import base64
 
-    token = base64.b64encode(f"{USER}:{APP}".encode()).decode()
+    user, app = cs.wp_credentials()
+    token = base64.b64encode(f"{user}:{app}".encode()).decode()
     return {
         "Authorization": f"Basic {token}",
         "Content-Type": "application/json",
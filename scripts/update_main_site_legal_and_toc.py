@@ -121,7 +121,7 @@ def _ensure_prefix(content: str) -> tuple[str, bool]:
 
 def main() -> None:
     session = requests.Session()
-    session.auth = (cs.WP_USERNAME, cs.WP_APP_PASSWORD)
+    session.auth = cs.wp_credentials()
 
     scanned = 0
     updated = 0
@@ -8,9 +8,7 @@ SD????????????CTA/?????????????
 from __future__ import annotations
 
 import argparse
-import io
 import logging
-import os
 import re
 import sys
 from pathlib import Path
@@ -20,11 +18,11 @@ sys.path.append(str(project_root))
 
 from src.core.config import get_config
 from src.clients.wordpress import WPClient
-from scripts.configure_sites import SITES, WP_APP_PASSWORD as DEFAULT_WP_APP_PASSWORD, WP_USERNAME as DEFAULT_WP_USERNAME
+from scripts.configure_sites import SITES, wp_credentials
 
 if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8")
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
 
 logging.basicConfig(
     level=logging.INFO,
@@ -339,8 +337,11 @@ def main() -> None:
         wp_app_password = config.wp_app_password
     except Exception as exc:
         logger.warning(f"get_config failed, fallback to WP-only credentials: {exc}")
-        wp_username = os.getenv("WP_USERNAME", DEFAULT_WP_USERNAME)
-        wp_app_password = os.getenv("WP_APP_PASSWORD", DEFAULT_WP_APP_PASSWORD)
+        try:
+            wp_username, wp_app_password = wp_credentials()
+        except RuntimeError as cred_exc:
+            logger.error(f"WP credentials are missing: {cred_exc}")
+            return
 
     if not wp_username or not wp_app_password:
         logger.error("WP credentials are missing. Set WP_USERNAME/WP_APP_PASSWORD or configure scripts.configure_sites.")
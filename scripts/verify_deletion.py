@@ -12,8 +12,8 @@ from src.clients.wordpress import WPClient
 from src.core.config import get_config
 
 if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8")
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
 
 logging.basicConfig(
     level=logging.INFO,
@@ -37,7 +37,7 @@ def check_posts(base_url: str, label: str) -> None:
         app_password=_required_env("WP_APP_PASSWORD"),
     )
     try:
-        posts = wp_client.get_recent_posts(limit=1, status="any")
+        posts = wp_client.get_recent_posts(limit=1, status="any", fields="id")
         if len(posts) == 0:
             logger.info("[%s] %s: 0 posts (Clean)", label, base_url)
         else:
@@ -47,10 +47,11 @@ def check_posts(base_url: str, label: str) -> None:
 
 
 def main() -> None:
+    # get_config() が .env を読み込むので、資格情報チェックより先に呼ぶ
+    config = get_config()
     _required_env("WP_USERNAME")
     _required_env("WP_APP_PASSWORD")
 
-    config = get_config()
     logger.info("Verifying post counts...")
 
     check_posts(config.wp_base_url, "MAIN SITE")
@@ -1,13 +1,13 @@
 """
 FANZA/DMM APIクライアント
 """
-import time
 import logging
-from typing import Any
+from typing import Any, Iterator
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from src.core.http import RETRY_JITTER as _RETRY_JITTER, load_json as _load_json
 from src.core.models import Product
 
 logger = logging.getLogger(__name__)
@@ -18,19 +18,26 @@ class FanzaClient:
     # DMM Affiliate API エンドポイント（差し替え可能）
     BASE_URL = "https://api.dmm.com/affiliate/v3/ItemList"
     
-    def __init__(self, api_key: str, affiliate_id: str):
+    def __init__(self, api_key: str, affiliate_id: str, session: requests.Session | None = None):
         self.api_key = api_key
         self.affiliate_id = affiliate_id
+        self.timeout = 20  # タイムアウト20秒
+        
+        # 共有セッションが渡されればそれを使う（接続プールの使い回し）
+        if session is not None:
+            self.session = session
+            return
         
         # リトライ設定付きセッション
         self.session = requests.Session()
         retry_strategy = Retry(
-            total=2,  # 最大2回リトライ
-            backoff_factor=1,  # 1s, 2s
+            total=3,  # 最大3回リトライ（GETのみなので安全）
+            backoff_factor=0.5,  # 0.5s, 1s, 2s（+ジッター）
             status_forcelist=[429, 500, 502, 503, 504],
             allowed_methods=["GET"],
+            **_RETRY_JITTER,
+            respect_retry_after_header=True,  # 429のRetry-Afterはアダプター側で待機
         )
-        self.timeout = 20  # タイムアウト20秒
         adapter = HTTPAdapter(max_retries=retry_strategy)
         self.session.mount("https://", adapter)
         self.session.mount("http://", adapter)
@@ -49,6 +56,25 @@ class FanzaClient:
         """
         商品を検索して取得
         """
+        return list(self.iter_search(
+            limit=limit, site=site, service=service, floor=floor,
+            sort=sort, keyword=keyword, since=since, offset=offset,
+        ))
+
+    def iter_search(
+        self,
+        limit: int = 10,
+        site: str = "FANZA",
+        service: str = "digital",
+        floor: str = "videoa",
+        sort: str = "date",
+        keyword: str | None = None,
+        since: str | None = None,
+        offset: int = 0,
+    ) -> Iterator[Product]:
+        """
+        商品を検索し、レスポンスの商品を1件ずつ返す（Productのリストを作らない）
+        """
         params = {
             "api_id": self.api_key,
             "affiliate_id": self.affiliate_id,
@@ -68,37 +94,31 @@ class FanzaClient:
             params["gte_date"] = since.replace("-", "")
         
         try:
-            while True:
-                logger.info(f"FANZA API呼び出し: limit={limit}, sort={sort}, offset={offset}")
-                response = self.session.get(
-                    self.BASE_URL,
-                    params=params,
-                    timeout=(5.0, 30.0),  # (connect, read) タイムアウト
-                )
-                
-                if response.status_code >= 400:
-                    logger.error(f"FANZA API error body: {response.text}")
-
-                if response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", 60))
-                    logger.warning(f"レート制限。{retry_after}秒待機して再試行...")
-                    time.sleep(retry_after)
-                    continue  # ループで再試行
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                return self._parse_response(data)
+            logger.info("FANZA API呼び出し: limit=%s, sort=%s, offset=%s", limit, sort, offset)
+            # 429/5xx の再試行（Retry-After の待機を含む）はセッションのRetryに任せる
+            response = self.session.get(
+                self.BASE_URL,
+                params=params,
+                timeout=(5.0, 30.0),  # (connect, read) タイムアウト
+            )
+            
+            if response.status_code >= 400:
+                logger.error("FANZA API error body: %s", response.text)
+            
+            response.raise_for_status()
+            data = _load_json(response)
         except requests.exceptions.Timeout:
             logger.error("FANZA APIタイムアウト")
             raise
         except requests.exceptions.RequestException as e:
-            logger.error(f"FANZA APIエラー: {e}")
+            logger.error("FANZA APIエラー: %s", e)
             raise
+        
+        yield from self._parse_response(data)
     
     def fetch(self, limit: int = 1, since: str | None = None, sort: str = "date", keyword: str | None = None, offset: int = 0) -> list[dict]:
         """商品を取得してdict形式で返す（シンプルAPI）"""
-        products = self.search(limit=limit, since=since, sort=sort, keyword=keyword, offset=offset)
+        products = self.iter_search(limit=limit, since=since, sort=sort, keyword=keyword, offset=offset)
         return [p.to_dict() for p in products]
     
     def fetch_by_id(self, content_id: str) -> list[dict]:
@@ -115,74 +135,70 @@ class FanzaClient:
         }
         
         try:
-            logger.info(f"FANZA API呼び出し（ID指定）: cid={content_id}")
+            logger.info("FANZA API呼び出し（ID指定）: cid=%s", content_id)
             response = self.session.get(
                 self.BASE_URL,
                 params=params,
                 timeout=self.timeout,
             )
             response.raise_for_status()
-            data = response.json()
-            products = self._parse_response(data)
-            return [p.to_dict() for p in products]
+            data = _load_json(response)
+            return [p.to_dict() for p in self._parse_response(data)]
         except Exception as e:
-            logger.error(f"FANZA API（ID指定）エラー: {e}")
+            logger.error("FANZA API（ID指定）エラー: %s", e)
             return []
 
-    def _parse_response(self, data: dict[str, Any]) -> list[Product]:
-        """APIレスポンスをProductリストにパース"""
-        products = []
+    def _parse_response(self, data: dict[str, Any]) -> Iterator[Product]:
+        """APIレスポンスの商品を順にProductへパース（失敗した商品は飛ばす）"""
         result = data.get("result", {})
         items = result.get("items", [])
-        
         for item in items:
-            try:
-                actress_list = []
-                if "iteminfo" in item and "actress" in item["iteminfo"]:
-                    actress_list = [a.get("name", "") for a in item["iteminfo"]["actress"]]
-                
-                genre_list = []
-                if "iteminfo" in item and "genre" in item["iteminfo"]:
-                    genre_list = [g.get("name", "") for g in item["iteminfo"]["genre"]]
-                
-                maker = ""
-                if "iteminfo" in item and "maker" in item["iteminfo"]:
-                    makers = item["iteminfo"]["maker"]
-                    if makers:
-                        maker = makers[0].get("name", "")
-                
-                image_url = ""
-                if "imageURL" in item:
-                    image_url = item["imageURL"].get("large", item["imageURL"].get("small", ""))
-                
-                sample_movie_url = ""
-                if "sampleMovieURL" in item:
-                    movie_data = item["sampleMovieURL"]
-                    sample_movie_url = movie_data.get("size_720_480", movie_data.get("size_644_414", movie_data.get("size_476_306", "")))
+            product = self._parse_item(item)
+            if product is not None:
+                yield product
+
+    def _parse_item(self, item: dict[str, Any]) -> Product | None:
+        """API商品1件をProductへパース"""
+        try:
+            # ネストしたdictは一度だけ取り出して使い回す
+            iteminfo = item.get("iteminfo") or {}
+            actress_list = [a.get("name", "") for a in iteminfo.get("actress", ())]
+            genre_list = [g.get("name", "") for g in iteminfo.get("genre", ())]
+            
+            maker = ""
+            makers = iteminfo.get("maker")
+            if makers:
+                maker = makers[0].get("name", "")
+            
+            image_data = item.get("imageURL") or {}
+            image_url = image_data.get("large", image_data.get("small", ""))
+            
+            movie_data = item.get("sampleMovieURL") or {}
+            sample_movie_url = movie_data.get("size_720_480", movie_data.get("size_644_414", movie_data.get("size_476_306", "")))
 
-                sample_urls = []
-                if "sampleImageURL" in item:
-                    sample_data = item["sampleImageURL"]
-                    if "sample_l" in sample_data and "image" in sample_data["sample_l"]:
-                        sample_urls = sample_data["sample_l"]["image"][:10]
-                    elif "sample_s" in sample_data and "image" in sample_data["sample_s"]:
-                        sample_urls = sample_data["sample_s"]["image"][:10]
-                
-                product = Product(
-                    product_id=item.get("content_id", item.get("product_id", "")),
-                    title=item.get("title", ""),
-                    actress=actress_list,
-                    maker=maker,
-                    genre=genre_list,
-                    release_date=item.get("date", ""),
-                    summary=item.get("description", item.get("title", "")),
-                    package_image_url=image_url,
-                    affiliate_url=item.get("affiliateURL", item.get("URL", "")),
-                    sample_image_urls=sample_urls,
-                    sample_movie_url=sample_movie_url,
-                )
-                products.append(product)
-            except Exception as e:
-                logger.warning(f"商品パースエラー: {e}, item={item.get('content_id', 'unknown')}")
-                continue
-        return products
+            sample_urls = []
+            sample_data = item.get("sampleImageURL") or {}
+            sample_l = sample_data.get("sample_l") or {}
+            sample_s = sample_data.get("sample_s") or {}
+            if "image" in sample_l:
+                sample_urls = sample_l["image"][:10]
+            elif "image" in sample_s:
+                sample_urls = sample_s["image"][:10]
+            
+            product = Product(
+                product_id=item.get("content_id", item.get("product_id", "")),
+                title=item.get("title", ""),
+                actress=actress_list,
+                maker=maker,
+                genre=genre_list,
+                release_date=item.get("date", ""),
+                summary=item.get("description", item.get("title", "")),
+                package_image_url=image_url,
+                affiliate_url=item.get("affiliateURL", item.get("URL", "")),
+                sample_image_urls=sample_urls,
+                sample_movie_url=sample_movie_url,
+            )
+            return product
+        except Exception as e:
+            logger.warning("商品パースエラー: %s, item=%s", e, item.get("content_id", "unknown"))
+            return None
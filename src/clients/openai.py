@@ -1,19 +1,47 @@
 """
 OpenAI APIクライアント
 """
+import functools
+import hashlib
 import json
+import os
 import random
+import re
 import logging
+import threading
+import time
 from pathlib import Path
 from typing import Any
 import httpx
 from openai import OpenAI
 import openai
 
+try:
+    import orjson as _orjson  # 任意依存（あれば応答JSONのデコードが高速）
+except ImportError:
+    _orjson = None
+
+# orjson.JSONDecodeErrorはjson.JSONDecodeErrorのサブクラスなので例外処理は共通
+_json_loads = _orjson.loads if _orjson is not None else json.loads
+
 logger = logging.getLogger(__name__)
 
+# response_formatを指定できないモデルがコードフェンスで包んで返した場合の取り出し用
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*\})\s*```", re.DOTALL)
+
+
+@functools.lru_cache(maxsize=512)
+def _format_viewpoints(pairs: tuple[tuple[str, str], ...]) -> str:
+    """(観点名, 説明)の組をプロンプト用の箇条書きに整形（同じ組み合わせは使い回す）"""
+    return "\n".join(f"- {name}: {description}" for name, description in pairs)
+
+
 class OpenAIClient:
     """OpenAI GPTによる記事生成"""
+    # 429/5xx/タイムアウト/接続エラーの再試行回数（SDKが指数バックオフ+ジッターとRetry-Afterで待機）
+    _MAX_RETRIES = 4
+    # 生成結果キャッシュの有効期間（投稿失敗後の再実行で同じ商品を再生成しないため）
+    _CACHE_TTL_SECONDS = 7 * 24 * 3600
     _SITE_SECTION_TITLES = {
         "sd02-shirouto": ["リアル度チェック", "距離感メーター", "日常感ポイント"],
         "sd03-gyaru": ["ギャル度指数", "テンション感", "派手さスパーク"],
@@ -32,21 +60,33 @@ class OpenAIClient:
         model: str,
         prompts_dir: Path,
         viewpoints_path: Path,
+        max_concurrent: int = 4,
+        cache_dir: Path | None = None,
     ):
-        self.client = OpenAI(api_key=api_key)
+        # 同期クライアントはスレッド間で共有できる。商品の並列処理から同時に呼ばれる数だけ上限を設ける
+        self.client = OpenAI(api_key=api_key, max_retries=self._MAX_RETRIES)
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
         self.model = model
         self.prompts_dir = prompts_dir
         self.system_prompt = self._load_template("system.txt")
         self.user_template = self._load_template("user.txt")
         self.viewpoints = self._load_viewpoints(viewpoints_path)
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+        # プロンプトを書き換えたら古いキャッシュは使わない
+        self._prompt_digest = hashlib.sha256(
+            (self.system_prompt + "\0" + self.user_template).encode("utf-8")
+        ).hexdigest()
         logger.info(f"OpenAIクライアント初期化: model={model}, 観点数={len(self.viewpoints)}")
     
     def _load_template(self, filename: str) -> str:
         """テンプレートファイルを読み込む"""
         path = self.prompts_dir / filename
-        if not path.exists():
-            raise FileNotFoundError(f"プロンプトテンプレートが見つかりません: {path}")
-        return path.read_text(encoding="utf-8")
+        try:
+            return path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"プロンプトテンプレートが見つかりません: {path}") from None
     
     def _load_viewpoints(self, path: Path) -> list[dict[str, str]]:
         """観点カードを読み込む"""
@@ -75,16 +115,71 @@ class OpenAIClient:
             "出力はJSONの site_sections 配列（title, body）に入れる。\n"
         )
     
-    def _select_viewpoints(self, count: int = 2) -> list[dict[str, str]]:
-        """ランダムに観点を選択"""
+    def _select_viewpoints(self, product_id: str, count: int = 2) -> list[dict[str, str]]:
+        """観点を選択（商品IDをシードにするので、同じ商品なら再実行しても同じ観点になる）"""
         if len(self.viewpoints) < count:
             return self.viewpoints
-        return random.sample(self.viewpoints, count)
+        seed = hashlib.blake2b(str(product_id).encode("utf-8"), digest_size=8).digest()
+        return random.Random(seed).sample(self.viewpoints, count)
     
-    def generate_article(self, product: dict[str, Any], sample_image_urls: list[str] | None = None, site_info: Any = None) -> dict[str, str]:
-        """商品データから記事を生成（マルチモーダル対応）"""
-        selected_viewpoints = self._select_viewpoints(2)
-        viewpoint_text = "\n".join([f"- {v['name']}: {v['description']}" for v in selected_viewpoints])
+    def _cache_path(self, product: dict[str, Any], sample_image_urls: list[str], site_info: Any) -> Path | None:
+        """生成結果キャッシュのファイルパス（モデル・商品・サイト・画像・プロンプトで決まる）"""
+        if self.cache_dir is None:
+            return None
+        key = json.dumps(
+            [
+                self.model,
+                str(product["product_id"]),
+                getattr(site_info, "subdomain", None),
+                sample_image_urls[:3],
+                self._prompt_digest,
+            ],
+            ensure_ascii=False,
+        )
+        return self.cache_dir / f"{hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()}.json"
+
+    def _load_cached(self, path: Path) -> str | None:
+        """期限内のキャッシュがあれば生の応答を返す"""
+        try:
+            if time.time() - path.stat().st_mtime > self._CACHE_TTL_SECONDS:
+                return None
+            return path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def _store_cached(self, path: Path, raw_response: str) -> None:
+        """JSONとして読める応答だけを保存（書きかけを読まないよう一時ファイルから置き換え）"""
+        try:
+            _json_loads(raw_response)
+        except (TypeError, json.JSONDecodeError):
+            return
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_text(raw_response, encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"生成結果キャッシュの保存に失敗: {e}")
+
+    def generate_article(
+        self,
+        product: dict[str, Any],
+        sample_image_urls: list[str] | None = None,
+        site_info: Any = None,
+        force_regen: bool = False,
+    ) -> dict[str, str]:
+        """商品データから記事を生成（マルチモーダル対応。キャッシュがあればAPIを呼ばない）"""
+        sample_image_urls = sample_image_urls or []
+        cache_path = self._cache_path(product, sample_image_urls, site_info)
+        if cache_path is not None and not force_regen:
+            cached = self._load_cached(cache_path)
+            if cached is not None:
+                logger.info(f"記事生成キャッシュを使用: {product['product_id']}")
+                result = self._parse_response(cached)
+                result["raw_response"] = cached
+                return result
+
+        selected_viewpoints = self._select_viewpoints(product["product_id"], 2)
+        viewpoint_text = _format_viewpoints(tuple((v["name"], v["description"]) for v in selected_viewpoints))
         
         site_context = ""
         if site_info:
@@ -108,7 +203,6 @@ class OpenAIClient:
             affiliate_url=product["affiliate_url"],
             viewpoints=viewpoint_text,
         )
-        sample_image_urls = sample_image_urls or []
         if sample_image_urls and "gpt-4" in self.model:
             user_content = [{"type": "text", "text": user_prompt + "\n\n## シーン画像\n以下の画像を見て、それぞれの画像に対応したシーン説明を生成してください。"}]
             for img_url in sample_image_urls[:3]:
@@ -118,17 +212,20 @@ class OpenAIClient:
             messages = [{"role": "system", "content": self.system_prompt}, {"role": "user", "content": user_prompt}]
         try:
             timeout = httpx.Timeout(90.0, connect=10.0)
-            response = self.client.chat.completions.with_raw_response.create(
-                model=self.model,
-                messages=messages,
-                max_completion_tokens=2000,
-                timeout=timeout,
-                response_format={ "type": "json_object" } if any(m in self.model for m in ["gpt-4", "gpt-3.5-turbo-0125"]) else None
-            )
+            with self._slots:
+                response = self.client.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=messages,
+                    max_completion_tokens=2000,
+                    timeout=timeout,
+                    response_format={ "type": "json_object" } if any(m in self.model for m in ["gpt-4", "gpt-3.5-turbo-0125"]) else None
+                )
             chat_completion = response.parse()
             raw_response = chat_completion.choices[0].message.content
             result = self._parse_response(raw_response)
             result["raw_response"] = raw_response
+            if cache_path is not None:
+                self._store_cached(cache_path, raw_response)
             return result
         except Exception as e:
             logger.error(f"OpenAI APIエラー: {e}")
@@ -138,23 +235,33 @@ class OpenAIClient:
         """商品データからAI応答を生成"""
         return self.generate_article(item, sample_image_urls, site_info=site_info)
     
+    @staticmethod
+    def _extract_fields(data: dict) -> dict:
+        """パース済みJSONから記事フィールドを取り出す"""
+        return {
+            "title": data.get("title", ""),
+            "short_description": data.get("short_description", ""),
+            "highlights": data.get("highlights", []),
+            "meters": data.get("meters", {}),
+            "scenes": data.get("scenes", []),
+            "checklist": data.get("checklist", {}),
+            "ratings": data.get("ratings", {}),
+            "site_sections": data.get("site_sections", []),
+            "summary": data.get("summary", ""),
+            "faq": data.get("faq", []),
+            "cta_text": data.get("cta_text", "今すぐ堪能する"),
+            "excerpt": data.get("excerpt", ""),
+        }
+
     def _parse_response(self, response: str) -> dict:
-        """OpenAIの応答をパース"""
+        """OpenAIの応答をパース（素のJSON、なければコードフェンス内のJSONを一度だけ読む）"""
         try:
-            data = json.loads(response)
-            return {
-                "title": data.get("title", ""),
-                "short_description": data.get("short_description", ""),
-                "highlights": data.get("highlights", []),
-                "meters": data.get("meters", {}),
-                "scenes": data.get("scenes", []),
-                "checklist": data.get("checklist", {}),
-                "ratings": data.get("ratings", {}),
-                "site_sections": data.get("site_sections", []),
-                "summary": data.get("summary", ""),
-                "faq": data.get("faq", []),
-                "cta_text": data.get("cta_text", "今すぐ堪能する"),
-                "excerpt": data.get("excerpt", ""),
-            }
+            return self._extract_fields(_json_loads(response))
         except json.JSONDecodeError:
+            match = _JSON_FENCE_RE.search(response)
+            if match:
+                try:
+                    return self._extract_fields(_json_loads(match.group(1)))
+                except json.JSONDecodeError:
+                    pass
             return {"title": "レビュー", "summary": response[:200], "scenes": [], "ratings": {}, "short_description": "", "cta_text": "今すぐ堪能する", "excerpt": "", "site_sections": []}
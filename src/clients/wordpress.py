@@ -3,8 +3,11 @@ WordPress REST APIクライアント
 """
 import base64
 import logging
+import threading
 import time
-from typing import Any, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterator
 from pathlib import Path
 import re
 import html as _html
@@ -13,8 +16,44 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from src.core.http import RETRY_JITTER as _RETRY_JITTER, load_json as _load_json, orjson as _orjson
+
 logger = logging.getLogger(__name__)
 
+_shared_session: requests.Session | None = None
+_shared_session_lock = threading.Lock()
+
+
+def _get_shared_session() -> requests.Session:
+    """全WPClientで共有するセッション（接続プールを使い回してTLSハンドシェイクを減らす）"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            session = requests.Session()
+            # User-Agentをブラウザ風に偽装 (Mixhost/WAF対策)
+            session.headers.update({
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+                "Accept": "application/json"
+            })
+            retry_strategy = Retry(
+                total=2,  # 最大2回リトライ（POSTも対象なので回数は増やさない）
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET", "POST"],
+                respect_retry_after_header=True,
+                **_RETRY_JITTER,
+            )
+            # 複数サイト（本体+サブドメイン）分のホスト別プールを保持
+            adapter = HTTPAdapter(
+                pool_connections=WPClient._POOL_SIZE,
+                pool_maxsize=WPClient._POOL_SIZE,
+                max_retries=retry_strategy,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _shared_session = session
+        return _shared_session
+
 class WPClient:
     """WordPress REST APIクライアント"""
 
@@ -26,12 +65,17 @@ class WPClient:
         re.compile(r"(?i)cid%3d([A-Za-z0-9_\\-]+)"),
         re.compile(r"(?i)content_id=([A-Za-z0-9_\\-]+)"),
     )
+    # 並列アップロード/削除のワーカー数を上回るように接続プールを確保
+    _POOL_SIZE = 16
+    # /batch/v1 が1回で受け付けるサブリクエスト数の上限（WP既定値）
+    _BATCH_MAX = 25
     
     def __init__(
         self,
         base_url: str,
         username: str,
         app_password: str,
+        session: requests.Session | None = None,
     ):
         self.base_url = base_url.rstrip("/")
         self.api_url = f"{self.base_url}/wp-json/wp/v2"
@@ -43,30 +87,23 @@ class WPClient:
         encoded = base64.b64encode(credentials.encode()).decode()
         self.auth_header = f"Basic {encoded}"
         
-        # リトライ設定付きセッション
-        self.session = requests.Session()
-        # User-Agentをブラウザ風に偽装 (Mixhost/WAF対策)
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "application/json"
-        })
-        
-        retry_strategy = Retry(
-            total=2,  # 最大2回リトライ
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST"],
-        )
+        # リトライ設定付きセッション（未指定ならプロセス内で共有。認証はリクエスト毎のヘッダー）
+        self.session = session or _get_shared_session()
         self.timeout = 20  # タイムアウト20秒
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("https://", adapter)
-        self.session.mount("http://", adapter)
         
         # カテゴリ/タグのキャッシュ
         self._category_cache: dict[str, int] = {}
+        self._category_list_cache: dict[int, list[dict]] = {}
+        self._media_cache: dict[int, dict] = {}
         self._tag_cache: dict[str, int] = {}
+        self._missing_tags: set[str] = set()
+        # 複数商品を並列処理する際、同名タームの二重作成を防ぐ
+        self._taxonomy_lock = threading.Lock()
         self._posted_fanza_ids_cache: set[str] | None = None
         self._posted_fanza_ids_cache_at: float = 0.0
+        self._posted_fanza_ids_lock = threading.Lock()
+        # batch/v1 が無いと分かったサイトでは以降の呼び出しで再確認しない
+        self._batch_available = True
 
     @classmethod
     def _extract_fanza_id_from_slug(cls, slug: str) -> str | None:
@@ -186,7 +223,7 @@ class WPClient:
                 # Other 400s (e.g. forbidden draft status due auth mismatch) should surface.
                 response.raise_for_status()
             response.raise_for_status()
-            posts = response.json()
+            posts = _load_json(response)
             if not posts or not isinstance(posts, list):
                 break
 
@@ -215,6 +252,10 @@ class WPClient:
         url = f"{self.api_url}/{endpoint}"
         headers = kwargs.pop("headers", {})
         headers["Authorization"] = self.auth_header
+        if _orjson is not None and kwargs.get("json") is not None:
+            # 本文HTMLを含むペイロードはorjsonでbytesに直接エンコードする
+            kwargs["data"] = _orjson.dumps(kwargs.pop("json"))
+            headers["Content-Type"] = "application/json"
         
         response = self.session.request(
             method,
@@ -302,11 +343,34 @@ class WPClient:
         cache_ttl_seconds: int = 600,
         after: str | None = None,
     ) -> set[str]:
-        """既存投稿からFANZA商品IDを取得"""
-        if use_cache and after is None and self._posted_fanza_ids_cache is not None:
-            if (time.time() - self._posted_fanza_ids_cache_at) < cache_ttl_seconds:
+        """
+        既存投稿からFANZA商品IDを取得。
+        キャッシュ期限切れ時は前回取得以降の投稿だけを取り直して差分をマージする。
+        """
+        if after is not None or not use_cache:
+            posted_ids = self._scan_posted_fanza_ids(per_page, max_pages, after)
+            if after is None:
+                with self._posted_fanza_ids_lock:
+                    self._posted_fanza_ids_cache = set(posted_ids)
+                    self._posted_fanza_ids_cache_at = time.time()
+            return posted_ids
+
+        # 並列処理中に同時に期限切れを検知しても、取得は1スレッドだけが行う
+        with self._posted_fanza_ids_lock:
+            now = time.time()
+            if self._posted_fanza_ids_cache is None:
+                self._posted_fanza_ids_cache = self._scan_posted_fanza_ids(per_page, max_pages, None)
+            elif (now - self._posted_fanza_ids_cache_at) >= cache_ttl_seconds:
+                # 前回取得時刻から少し遡って差分のみ取得（時計ずれ・タイムゾーン解釈の余裕）
+                since = datetime.fromtimestamp(self._posted_fanza_ids_cache_at, timezone.utc) - timedelta(hours=1)
+                self._posted_fanza_ids_cache |= self._scan_posted_fanza_ids(per_page, max_pages, since.isoformat())
+            else:
                 return set(self._posted_fanza_ids_cache)
+            self._posted_fanza_ids_cache_at = now
+            return set(self._posted_fanza_ids_cache)
 
+    def _scan_posted_fanza_ids(self, per_page: int, max_pages: int | None, after: str | None) -> set[str]:
+        """投稿を走査してFANZA商品IDを集める（取得エラー時はそこまでの結果を返す）"""
         posted_ids: set[str] = set()
         try:
             for post in self.iter_posts(
@@ -324,9 +388,6 @@ class WPClient:
             logger.warning(f"WP投稿取得エラー: {e}")
 
         logger.info(f"WordPress投稿済みID抽出結果: {len(posted_ids)}件")
-        if after is None:
-            self._posted_fanza_ids_cache = set(posted_ids)
-            self._posted_fanza_ids_cache_at = time.time()
         return posted_ids
 
     def check_post_exists_by_slug(self, product_id: str) -> bool:
@@ -334,7 +395,7 @@ class WPClient:
         try:
             # WP REST API の `search` は slug を検索対象にしないため、直近投稿を走査する
             needle = str(product_id).lower()
-            posts = self.get_recent_posts(limit=100, status="any")
+            posts = self.get_recent_posts(limit=100, status="any", fields="id,slug")
             for post in posts:
                 slug = (post.get("slug", "") or "").lower()
                 if needle and needle in slug:
@@ -391,35 +452,46 @@ class WPClient:
             logger.warning(f"FANZA ID重複チェック失敗: {e}")
             return False
 
-    def get_recent_posts(self, limit: int = 50, status: str = "any") -> list[dict]:
-        """最近の投稿を取得"""
-        response = self._request("GET", "posts", params={
+    def get_recent_posts(self, limit: int = 50, status: str = "any", fields: str | None = None) -> list[dict]:
+        """最近の投稿を取得（fields指定時は _fields で必要な項目だけ返させる）"""
+        params = {
             "per_page": limit,
             "status": status,
             "context": "edit",
             "orderby": "date",
             "order": "desc",
-        })
+        }
+        if fields:
+            params["_fields"] = fields
+        response = self._request("GET", "posts", params=params)
         response.raise_for_status()
-        return response.json()
+        return _load_json(response)
 
     def get_post(self, post_id: int) -> dict:
         """投稿を取得"""
         response = self._request("GET", f"posts/{post_id}", params={"context": "edit"})
         response.raise_for_status()
-        return response.json()
+        return _load_json(response)
 
     def get_media(self, media_id: int) -> dict:
-        """メディア情報を取得"""
-        response = self._request("GET", f"media/{media_id}")
-        response.raise_for_status()
-        return response.json()
+        """メディア情報を取得（同じIDは実行中キャッシュから返す）"""
+        cached = self._media_cache.get(media_id)
+        if cached is None:
+            response = self._request("GET", f"media/{media_id}")
+            response.raise_for_status()
+            cached = response.json()
+            self._media_cache[media_id] = cached
+        return cached
 
     def get_categories(self, per_page: int = 100) -> list[dict]:
-        """カテゴリ一覧を取得"""
-        response = self._request("GET", "categories", params={"per_page": per_page})
-        response.raise_for_status()
-        return response.json()
+        """カテゴリ一覧を取得（実行中は変わらないのでper_page単位でキャッシュ）"""
+        cached = self._category_list_cache.get(per_page)
+        if cached is None:
+            response = self._request("GET", "categories", params={"per_page": per_page})
+            response.raise_for_status()
+            cached = response.json()
+            self._category_list_cache[per_page] = cached
+        return list(cached)
     
     def get_tag_id(self, name: str) -> int | None:
         # Get tag id by name (no create).
@@ -427,6 +499,8 @@ class WPClient:
             return None
         if name in self._tag_cache:
             return self._tag_cache[name]
+        if name in self._missing_tags:
+            return None
         try:
             response = self._request("GET", "tags", params={"search": name})
             response.raise_for_status()
@@ -435,6 +509,8 @@ class WPClient:
                 if tag.get("name", "").lower() == name.lower():
                     self._tag_cache[name] = tag.get("id")
                     return tag.get("id")
+            # 存在しないタグも記録し、同じ女優の作品が続いても再検索しない
+            self._missing_tags.add(name)
         except Exception as exc:
             logger.warning(f"tag search failed: {name} - {exc}")
         return None
@@ -442,7 +518,7 @@ class WPClient:
     def _fetch_posts(self, params: dict) -> list[dict]:
         response = self._request("GET", "posts", params=params)
         response.raise_for_status()
-        return response.json()
+        return _load_json(response)
 
     def _strip_html(self, value: str) -> str:
         return re.sub(r"<[^>]+>", "", value or "").strip()
@@ -529,6 +605,13 @@ class WPClient:
         response.raise_for_status()
         return response.json()
     
+    def delete_media(self, media_id: int) -> dict:
+        """メディアを削除（メディアはゴミ箱に入らないため常にforce=true）"""
+        response = self._request("DELETE", f"media/{media_id}", params={"force": "true"})
+        response.raise_for_status()
+        self._media_cache.pop(media_id, None)
+        return response.json()
+
     def delete_post(self, post_id: int, force: bool = False) -> dict:
         """投稿を削除 (force=Trueで永久削除, Falseでゴミ箱)"""
         params = {"force": "true" if force else "false"}
@@ -536,6 +619,102 @@ class WPClient:
         response.raise_for_status()
         return response.json()
     
+    def _batch_request(self, sub_requests: list[dict[str, Any]]) -> list[dict[str, Any]] | None:
+        """/batch/v1 にまとめて投げ、サブレスポンスを返す（エンドポイントが無ければNone）"""
+        headers = {"Authorization": self.auth_header}
+        body = {"validation": "normal", "requests": sub_requests}
+        payload: dict[str, Any] = {"json": body}
+        if _orjson is not None:
+            # 本文HTMLを25件分まとめて送ることがあるので、エンコードは一度だけorjsonで済ませる
+            payload = {"data": _orjson.dumps(body)}
+            headers["Content-Type"] = "application/json"
+        response = None
+        for url in (f"{self.base_url}/wp-json/batch/v1", f"{self.base_url}/?rest_route=/batch/v1"):
+            response = self.session.post(url, headers=headers, timeout=self.timeout, **payload)
+            if response.status_code != 404:
+                break
+        if response is None or response.status_code in (404, 405, 501):
+            return None
+        if response.status_code >= 400:
+            logger.error(f"API Error: POST batch/v1 -> {response.status_code}")
+            logger.error(f"Response Body: {response.text}")
+        response.raise_for_status()
+        return _load_json(response).get("responses", [])
+
+    def delete_posts(self, post_ids: list[int], force: bool = False, workers: int = 1) -> dict[int, str | None]:
+        """
+        複数投稿をまとめて削除し、{post_id: エラー内容 or None} を返す。
+        /batch/v1（WP 5.6+）で25件ずつ送り、使えないサイトでは1件ずつDELETEする。
+        """
+        force_param = "true" if force else "false"
+        return self._run_batched(
+            post_ids,
+            lambda pid: {"method": "DELETE", "path": f"/wp/v2/posts/{pid}?force={force_param}"},
+            lambda pid: self.delete_post(pid, force=force),
+            label="DELETE",
+            workers=workers,
+        )
+
+    def update_posts(self, updates: dict[int, dict], workers: int = 1) -> dict[int, str | None]:
+        """
+        複数投稿をまとめて更新し、{post_id: エラー内容 or None} を返す。
+        delete_posts と同じく /batch/v1 で25件ずつ送り、使えないサイトでは1件ずつPOSTする。
+        """
+        return self._run_batched(
+            list(updates),
+            lambda pid: {"method": "POST", "path": f"/wp/v2/posts/{pid}", "body": updates[pid]},
+            lambda pid: self.update_post(pid, updates[pid]),
+            label="POST",
+            workers=workers,
+        )
+
+    def _run_batched(
+        self,
+        post_ids: list[int],
+        make_sub_request: Callable[[int], dict[str, Any]],
+        fallback: Callable[[int], Any],
+        label: str,
+        workers: int = 1,
+    ) -> dict[int, str | None]:
+        """投稿ごとの操作を /batch/v1 で25件ずつ送る（使えなければ fallback を並列に1件ずつ）"""
+        results: dict[int, str | None] = {}
+        for i in range(0, len(post_ids), self._BATCH_MAX):
+            chunk = post_ids[i:i + self._BATCH_MAX]
+            responses = None
+            if self._batch_available:
+                try:
+                    responses = self._batch_request([make_sub_request(pid) for pid in chunk])
+                    if responses is None:
+                        logger.info(f"batch/v1 が使えないため個別{label}に切り替えます")
+                        self._batch_available = False
+                except Exception as e:
+                    # バッチ自体の失敗（4xx/5xx・通信エラー）で全体を止めず、このチャンクは1件ずつ処理して個別の結果を返す
+                    logger.warning(f"batch/v1 が失敗したためこの{len(chunk)}件は個別{label}で処理します: {e}")
+                    responses = None
+            if responses is not None:
+                for pid, sub in zip(chunk, responses):
+                    status = int(sub.get("status", 500))
+                    if 200 <= status < 300:
+                        results[pid] = None
+                    else:
+                        message = (sub.get("body") or {}).get("message", "")
+                        results[pid] = f"{status} {message}".strip()
+                # レスポンス数が足りない分は失敗扱い
+                for pid in chunk[len(responses):]:
+                    results[pid] = "missing batch response"
+                continue
+
+            def _each(pid: int) -> str | None:
+                try:
+                    fallback(pid)
+                    return None
+                except Exception as e:
+                    return str(e)
+
+            with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+                results.update(zip(chunk, executor.map(_each, chunk)))
+        return results
+
     def post_draft(self, title: str, content: str, excerpt: str = "", slug: str = "", featured_media: int | None = None, categories: list[int] | None = None, tags: list[int] | None = None, fanza_product_id: str | None = None) -> int:
         """投稿を作成（本番公開）"""
         result = self.create_post(
@@ -586,37 +765,44 @@ class WPClient:
         """カテゴリを取得または作成"""
         if name in self._category_cache:
             return self._category_cache[name]
-        response = self._request("GET", "categories", params={"search": name})
-        response.raise_for_status()
-        categories = response.json()
-        for cat in categories:
-            if cat["name"].lower() == name.lower():
-                self._category_cache[name] = cat["id"]
-                return cat["id"]
-        response = self._request("POST", "categories", json={"name": name})
-        response.raise_for_status()
-        cat = response.json()
-        self._category_cache[name] = cat["id"]
-        logger.info(f"カテゴリ作成: {name} -> id={cat['id']}")
-        return cat["id"]
+        with self._taxonomy_lock:
+            if name in self._category_cache:
+                return self._category_cache[name]
+            response = self._request("GET", "categories", params={"search": name})
+            response.raise_for_status()
+            categories = response.json()
+            for cat in categories:
+                if cat["name"].lower() == name.lower():
+                    self._category_cache[name] = cat["id"]
+                    return cat["id"]
+            response = self._request("POST", "categories", json={"name": name})
+            response.raise_for_status()
+            cat = response.json()
+            self._category_cache[name] = cat["id"]
+            self._category_list_cache.clear()
+            logger.info(f"カテゴリ作成: {name} -> id={cat['id']}")
+            return cat["id"]
     
     def get_or_create_tag(self, name: str) -> int:
         """タグを取得または作成"""
         if name in self._tag_cache:
             return self._tag_cache[name]
-        response = self._request("GET", "tags", params={"search": name})
-        response.raise_for_status()
-        tags = response.json()
-        for tag in tags:
-            if tag["name"].lower() == name.lower():
-                self._tag_cache[name] = tag["id"]
-                return tag["id"]
-        response = self._request("POST", "tags", json={"name": name})
-        response.raise_for_status()
-        tag = response.json()
-        self._tag_cache[name] = tag["id"]
-        logger.info(f"タグ作成: {name} -> id={tag['id']}")
-        return tag["id"]
+        with self._taxonomy_lock:
+            if name in self._tag_cache:
+                return self._tag_cache[name]
+            response = self._request("GET", "tags", params={"search": name})
+            response.raise_for_status()
+            tags = response.json()
+            for tag in tags:
+                if tag["name"].lower() == name.lower():
+                    self._tag_cache[name] = tag["id"]
+                    return tag["id"]
+            response = self._request("POST", "tags", json={"name": name})
+            response.raise_for_status()
+            tag = response.json()
+            self._tag_cache[name] = tag["id"]
+            logger.info(f"タグ作成: {name} -> id={tag['id']}")
+            return tag["id"]
     
     def prepare_taxonomies(
         self,
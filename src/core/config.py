@@ -5,12 +5,21 @@ import os
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Optional
-from dotenv import load_dotenv
 
-# .envファイルを読み込む
-# 基底ディレクトリ（プロジェクトルート）にある.envを読み込めるようにする
+# 基底ディレクトリ（プロジェクトルート）
 ROOT_DIR = Path(__file__).parent.parent.parent
-load_dotenv(ROOT_DIR / ".env")
+
+_dotenv_loaded = False
+
+
+def ensure_dotenv() -> None:
+    """プロジェクトルートの.envを初回のみ読み込む（YOYAKU_SKIP_DOTENV指定時は環境変数のみ使用）"""
+    global _dotenv_loaded
+    if _dotenv_loaded or os.getenv("YOYAKU_SKIP_DOTENV"):
+        return
+    from dotenv import load_dotenv
+    load_dotenv(ROOT_DIR / ".env")
+    _dotenv_loaded = True
 
 
 @dataclass
@@ -44,6 +53,7 @@ class Config:
     @classmethod
     def from_env(cls) -> "Config":
         """環境変数から設定を読み込む"""
+        ensure_dotenv()
         
         # 必須項目のチェック
         required_vars = [
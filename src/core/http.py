@@ -0,0 +1,29 @@
+"""
+HTTPクライアント共通設定（FANZA/WordPressクライアントで共有）
+"""
+import inspect
+from typing import Any
+
+import requests
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # 任意依存（あればJSONのエンコード/デコードが高速）
+except ImportError:
+    orjson = None
+
+# urllib3 2.x ではバックオフにジッターを入れ、並列ワーカーの再試行が同時に重ならないようにする
+RETRY_JITTER: dict[str, float] = (
+    {"backoff_jitter": 0.5} if "backoff_jitter" in inspect.signature(Retry.__init__).parameters else {}
+)
+
+
+def load_json(response: requests.Response) -> Any:
+    """レスポンスをJSONとしてデコード（orjsonがあればバイト列から直接）"""
+    if orjson is not None:
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            # 例外型をrequests側に揃えるため標準のデコードに任せる
+            pass
+    return response.json()
@@ -0,0 +1,26 @@
+"""
+ログ出力の非同期化
+"""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+def start_queue_logging() -> QueueListener:
+    """
+    ルートロガーの既存ハンドラーをQueueListener（別スレッド）へ移す。
+    呼び出し側はキュー投入のみになり、時刻整形やコンソール/ファイルI/Oで待たされない。
+    basicConfig等でハンドラーを設定した後に呼ぶこと。終了時に残りを書き出して停止する。
+    """
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
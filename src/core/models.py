@@ -5,7 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any, List, Optional, Dict
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     """FANZA商品データ"""
     product_id: str
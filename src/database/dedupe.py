@@ -3,25 +3,43 @@ SQLite重複防止ストア
 """
 import sqlite3
 import logging
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Literal
+from typing import Iterable, Literal
 from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
 Status = Literal["drafted", "failed", "dry_run", "processing", "published"]
 
+# 以後ずっと重複扱いになる確定ステータス
+_FINAL_STATUSES = ("drafted", "published")
+
 class DedupeStore:
     """投稿済み商品の管理"""
+
+    # SQLITE_MAX_VARIABLE_NUMBER（旧版の既定999）を超えないIN句の分割サイズ
+    _IN_CHUNK_SIZE = 900
     
     def __init__(self, db_path: Path):
         self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 呼び出しごとのopen/closeを避けるため接続を使い回す
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("PRAGMA cache_size=-20000")
+        self._lock = threading.RLock()
+        self._closed = False
+        # 確定ステータスのIDはメモリ上で判定（処理中/失敗はTTL判定が要るのでSQLで確認）
+        self._final_ids: set[str] = set()
         self._ensure_db()
     
     def _ensure_db(self) -> None:
         """データベースとテーブルを初期化"""
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
         with self._connect() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS posted_items (
@@ -32,6 +50,8 @@ class DedupeStore:
                     error_message TEXT
                 )
             """)
+            # ステータス別の集計/削除（get_stats, clear_failed）用
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_posted_items_status ON posted_items(status)")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS metadata (
                     key TEXT PRIMARY KEY,
@@ -39,20 +59,49 @@ class DedupeStore:
                 )
             """)
             conn.commit()
-            logger.debug(f"データベース初期化完了: {self.db_path}")
+            self._final_ids = {
+                str(r["product_id"])
+                for r in conn.execute(
+                    "SELECT product_id FROM posted_items WHERE status IN ('drafted', 'published')"
+                )
+            }
+            logger.debug(f"データベース初期化完了: {self.db_path} (確定済み {len(self._final_ids)}件)")
     
     @contextmanager
     def _connect(self):
-        """データベース接続のコンテキストマネージャ"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-        finally:
-            conn.close()
+        """共有接続のコンテキストマネージャ（スレッド間は排他）"""
+        with self._lock:
+            try:
+                yield self._conn
+            except Exception:
+                # 途中で失敗した書き込みを次のcommitに持ち越さない
+                self._conn.rollback()
+                raise
+
+    def _remember(self, product_id: str, status: str) -> None:
+        """書き込んだステータスを確定済みIDのキャッシュへ反映"""
+        if status in _FINAL_STATUSES:
+            self._final_ids.add(product_id)
+        else:
+            self._final_ids.discard(product_id)
+
+    def close(self) -> None:
+        """WALを本体DBへ書き戻してから接続を閉じる（コミット対象は.sqlite3本体のみのため）"""
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                logger.warning(f"WALチェックポイントに失敗: {e}")
+            self._conn.close()
+            self._closed = True
     
     def is_posted(self, product_id: str, processing_ttl_hours: int = 6, failed_retry_hours: int = 24) -> bool:
         """既に投稿済みかどうかを確認（処理中は一定時間だけ重複扱い）"""
+        if product_id in self._final_ids:
+            logger.debug(f"重複検出 (投稿済み): {product_id}")
+            return True
         with self._connect() as conn:
             row = conn.execute(
                 "SELECT status, created_at FROM posted_items WHERE product_id = ?",
@@ -60,31 +109,68 @@ class DedupeStore:
             ).fetchone()
             if row is None:
                 return False
-
-            status = str(row["status"])
-            if status in ("drafted", "published"):
+            if str(row["status"]) in _FINAL_STATUSES:
+                # 他プロセスが記録した分
+                self._final_ids.add(product_id)
                 logger.debug(f"重複検出 (投稿済み): {product_id}")
-                return True
+            return self._is_blocking_row(row, processing_ttl_hours, failed_retry_hours)
 
-            if status == "processing":
-                try:
-                    started_at = datetime.fromisoformat(str(row["created_at"]))
-                except Exception:
-                    # created_at が壊れている場合は保守的に「処理中」とみなす
-                    return True
-                if datetime.now() - started_at < timedelta(hours=processing_ttl_hours):
-                    return True
+    def is_posted_many(
+        self,
+        product_ids: Iterable[str],
+        processing_ttl_hours: int = 6,
+        failed_retry_hours: int = 24,
+    ) -> set[str]:
+        """複数IDをまとめて確認し、投稿済み扱いのIDを返す（判定はis_postedと同じ）"""
+        posted: set[str] = set()
+        ids = []
+        for pid in dict.fromkeys(product_ids):
+            if pid in self._final_ids:
+                posted.add(pid)
+            else:
+                ids.append(pid)
+        if not ids:
+            return posted
+        with self._connect() as conn:
+            for i in range(0, len(ids), self._IN_CHUNK_SIZE):
+                chunk = ids[i:i + self._IN_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT product_id, status, created_at FROM posted_items WHERE product_id IN ({placeholders})",
+                    chunk,
+                )
+                for row in rows:
+                    if str(row["status"]) in _FINAL_STATUSES:
+                        self._final_ids.add(str(row["product_id"]))
+                    if self._is_blocking_row(row, processing_ttl_hours, failed_retry_hours):
+                        posted.add(str(row["product_id"]))
+        return posted
 
+    @staticmethod
+    def _is_blocking_row(row: sqlite3.Row, processing_ttl_hours: int, failed_retry_hours: int) -> bool:
+        """posted_itemsの1行が新規処理を妨げるか"""
+        status = str(row["status"])
+        if status in _FINAL_STATUSES:
+            return True
 
-            if status == "failed":
-                try:
-                    failed_at = datetime.fromisoformat(str(row["created_at"]))
-                except Exception:
-                    return True
-                if datetime.now() - failed_at < timedelta(hours=failed_retry_hours):
-                    return True
+        if status == "processing":
+            try:
+                started_at = datetime.fromisoformat(str(row["created_at"]))
+            except Exception:
+                # created_at が壊れている場合は保守的に「処理中」とみなす
+                return True
+            if datetime.now() - started_at < timedelta(hours=processing_ttl_hours):
+                return True
+
+        if status == "failed":
+            try:
+                failed_at = datetime.fromisoformat(str(row["created_at"]))
+            except Exception:
+                return True
+            if datetime.now() - failed_at < timedelta(hours=failed_retry_hours):
+                return True
 
-            return False
+        return False
 
     def try_start(self, product_id: str, processing_ttl_hours: int = 6) -> bool:
         """
@@ -124,6 +210,7 @@ class DedupeStore:
                 (product_id, datetime.now().isoformat()),
             )
             conn.commit()
+            self._remember(product_id, "processing")
             logger.info(f"処理開始記録: {product_id}")
             return True
     
@@ -139,6 +226,7 @@ class DedupeStore:
                 (product_id, datetime.now().isoformat())
             )
             conn.commit()
+            self._remember(product_id, "processing")
             logger.info(f"処理開始記録: {product_id}")
     
     def record_success(self, product_id: str, wp_post_id: int | None = None, status: Status = "drafted") -> None:
@@ -153,6 +241,7 @@ class DedupeStore:
                 (product_id, status, wp_post_id, datetime.now().isoformat())
             )
             conn.commit()
+            self._remember(product_id, status)
             logger.info(f"成功記録: {product_id}, status={status}, wp_post_id={wp_post_id}")
 
     def bulk_mark_posted(self, items: list[tuple[str, int | None]], status: Status = "published") -> int:
@@ -185,6 +274,9 @@ class DedupeStore:
                 rows,
             )
             conn.commit()
+            if status in _FINAL_STATUSES:
+                # 既存の確定ステータスは保持されるので、全件が確定済みになる
+                self._final_ids.update(pid for pid, _ in items)
         return len(rows)
     
     def record_failure(self, product_id: str, error_message: str) -> None:
@@ -199,6 +291,7 @@ class DedupeStore:
                 (product_id, datetime.now().isoformat(), error_message)
             )
             conn.commit()
+            self._remember(product_id, "failed")
             logger.warning(f"失敗記録: {product_id}, error={error_message}")
     
     def get_stats(self) -> dict[str, int]:
@@ -207,9 +300,9 @@ class DedupeStore:
             cursor = conn.execute("""
                 SELECT 
                     COUNT(*) as total,
-                    SUM(CASE WHEN status = 'drafted' THEN 1 ELSE 0 END) as drafted,
-                    SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed,
-                    SUM(CASE WHEN status = 'dry_run' THEN 1 ELSE 0 END) as dry_run
+                    COUNT(*) FILTER (WHERE status = 'drafted') as drafted,
+                    COUNT(*) FILTER (WHERE status = 'failed') as failed,
+                    COUNT(*) FILTER (WHERE status = 'dry_run') as dry_run
                 FROM posted_items
             """)
             row = cursor.fetchone()
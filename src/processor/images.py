@@ -5,6 +5,8 @@ import logging
 import tempfile
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -14,14 +16,36 @@ class ImagePlaceholderError(Exception):
 
 class ImageTools:
     """画像処理ユーティリティ"""
+
+    # 並列処理中の同時ダウンロード数（商品並列 x 画像並列）を収められる接続プールサイズ
+    _POOL_SIZE = 16
     
-    def __init__(self, temp_dir: Path | None = None):
+    def __init__(self, temp_dir: Path | None = None, session: requests.Session | None = None):
         self.temp_dir = temp_dir or Path(tempfile.gettempdir())
+        # 共有セッションが渡されればそれを使う（接続プールの使い回し）
+        if session is not None:
+            self.session = session
+            return
         self.session = requests.Session()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Referer": "https://www.dmm.co.jp/"
         })
+        # 既定のプール(10)では溢れた接続が捨てられ、毎回TLSハンドシェイクし直すため広げる
+        retry_strategy = Retry(
+            total=2,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self._POOL_SIZE,
+            pool_maxsize=self._POOL_SIZE,
+            max_retries=retry_strategy,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
     def download(self, url: str, filename: str | None = None) -> Path:
         """画像をダウンロード"""
@@ -50,15 +74,38 @@ class ImageTools:
             filename = "image.jpg"
         logger.info(f"画像ダウンロード（メモリ）: {url}")
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            mime_type = response.headers.get("Content-Type", "image/jpeg")
-            content_size = len(response.content)
+            # ストリーミングで受信し、Content-Lengthが分かれば一度だけ確保したバッファへ書き込む
+            with self.session.get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                mime_type = response.headers.get("Content-Type", "image/jpeg")
+                try:
+                    expected = int(response.headers.get("Content-Length", "0") or 0)
+                except ValueError:
+                    expected = 0
+                buf = bytearray(expected)
+                view: memoryview | None = memoryview(buf)
+                offset = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    end = offset + len(chunk)
+                    if view is not None and end <= len(buf):
+                        view[offset:end] = chunk
+                    else:
+                        # 長さ不明/申告より長い場合は追記に切り替える
+                        if view is not None:
+                            view.release()
+                            view = None
+                        del buf[offset:]
+                        buf.extend(chunk)
+                    offset = end
+                if view is not None:
+                    view.release()
+                del buf[offset:]
+            content_size = len(buf)
             logger.info(f"ダウンロード成功: {filename} ({content_size} bytes, type={mime_type})")
             if content_size < 1000:
                 logger.warning(f"画像サイズが非常に小さいです ({content_size} bytes)。プレースホルダーの可能性があります。")
                 raise ImagePlaceholderError(f"画像がプレースホルダーです（サイズ: {content_size} bytes）。まだ準備されていない可能性があります。")
-            return response.content, filename, mime_type
+            return bytes(buf), filename, mime_type
         except ImagePlaceholderError:
             # Placeholder is expected; caller handles skip/retry.
             raise
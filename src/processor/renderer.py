@@ -8,6 +8,26 @@ from urllib.parse import parse_qs, quote_plus, urlparse
 
 logger = logging.getLogger(__name__)
 
+# テンプレートの {PLACEHOLDER}（英大文字・数字・_のみなので、CSS/JSの { ... } には当たらない）
+_PLACEHOLDER_RE = re.compile(r"\{([A-Z0-9_]+)\}")
+# rating.html / video.html は {{PLACEHOLDER}} 形式
+_DOUBLE_PLACEHOLDER_RE = re.compile(r"\{\{([A-Z0-9_]+)\}\}")
+# アフィリエイトURLのパス中の /cid=xxx/
+_CID_PATH_RE = re.compile(r"/cid=([^/?&#]+)", re.IGNORECASE)
+# 中身が空になったCTAの注記行・外部リンク行
+_EMPTY_NOTE_LINE_RE = re.compile(r"\n\s*<div class=\"aa-note-line\">\s*</div>")
+_EMPTY_EXTLINE_RE = re.compile(r"\n\s*<div class=\"aa-extline\">\s*</div>")
+
+
+def _fill(template: str, values: dict[str, str]) -> str:
+    """プレースホルダーを1パスで置換（valuesに無いものは後段の置換用にそのまま残す）"""
+    return _PLACEHOLDER_RE.sub(lambda m: values.get(m.group(1), m.group(0)), template)
+
+
+def _fill_double(template: str, values: dict[str, str]) -> str:
+    """{{PLACEHOLDER}} 形式のテンプレート用の1パス置換"""
+    return _DOUBLE_PLACEHOLDER_RE.sub(lambda m: values.get(m.group(1), m.group(0)), template)
+
 class Renderer:
     _SUBCOLOR_MAP = {
         "cream_pink": "#ffe3ef",
@@ -198,6 +218,7 @@ class Renderer:
     
     def __init__(self, templates_dir: Path):
         self.templates_dir = templates_dir
+        self._template_cache: dict[str, str] = {}
         
         # テンプレート読み込み
         self._hero_template = self._load_template("hero.html")
@@ -213,12 +234,19 @@ class Renderer:
         logger.info(f"Renderer初期化完了: templates_dir={templates_dir}")
 
     def _load_template(self, name: str) -> str:
-        """テンプレートファイルを読み込む"""
+        """テンプレートファイルを読み込む（記事ごとに読み直さないよう一度だけ）"""
+        cached = self._template_cache.get(name)
+        if cached is not None:
+            return cached
         path = self.templates_dir / name
-        if not path.exists():
+        try:
+            # 存在確認のstatを挟まず直接読む
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
             logger.error(f"テンプレートファイルが見つかりません: {path}")
-            return ""
-        return path.read_text(encoding="utf-8")
+            text = ""
+        self._template_cache[name] = text
+        return text
 
     def _load_site_decor(self) -> dict:
         """サイトテーマ設定を読み込み (site_theme_config.json を優先)"""
@@ -320,11 +348,11 @@ class Renderer:
                     values = nested_query.get(key, [])
                     if values and str(values[0]).strip():
                         return str(values[0]).strip()
-                nested_path_match = re.search(r"/cid=([^/?&#]+)", nested, re.IGNORECASE)
+                nested_path_match = _CID_PATH_RE.search(nested)
                 if nested_path_match and nested_path_match.group(1).strip():
                     return nested_path_match.group(1).strip()
 
-            path_match = re.search(r"/cid=([^/?&#]+)", affiliate_url, re.IGNORECASE)
+            path_match = _CID_PATH_RE.search(affiliate_url)
             if path_match and path_match.group(1).strip():
                 return path_match.group(1).strip()
 
@@ -417,12 +445,6 @@ class Renderer:
         """Heroセクションをレンダリング"""
         normalized_site_id = self._normalize_site_id(site_id)
         html = self._hero_template_sd03 if normalized_site_id.startswith("sd") and self._hero_template_sd03 else self._hero_template
-        html = html.replace("{EYECATCH_URL}", package_image_url)
-        html = html.replace("{TITLE}", title)
-        html = html.replace("{SHORT_DESCRIPTION}", short_description)
-        html = html.replace("{HIGHLIGHT_1}", highlights[0] if len(highlights) > 0 else "")
-        html = html.replace("{HIGHLIGHT_2}", highlights[1] if len(highlights) > 1 else "")
-        html = html.replace("{HIGHLIGHT_3}", highlights[2] if len(highlights) > 2 else "")
         callout_title, callout_body = self._SD_HERO_CALLOUT_MAP.get(
             normalized_site_id,
             ("\u26a0 \u4f5c\u54c1\u306e\u50be\u5411\u304c\u523a\u3055\u308b\u4eba\u5411\u3051", "\u597d\u307f\u3068\u9055\u3046\u5834\u5408\u306f\u30ea\u30f3\u30af\u5148\u306e\u8a73\u7d30\u60c5\u5831\u3082\u78ba\u8a8d\u3057\u3066\u304f\u3060\u3055\u3044\u3002"),
@@ -430,30 +452,33 @@ class Renderer:
         if normalized_site_id == "sd01-chichi":
             callout_title = "⚠ 巨乳が大好きな人向け"
             callout_body = "ボリューム感と密着感を重視して選びたいときに相性の良い一本です。"
-        html = html.replace("{HERO_CALLOUT_TITLE}", callout_title)
-        html = html.replace("{HERO_CALLOUT_BODY}", callout_body)
-
-        # Meters
-        html = html.replace("{METER_LABEL_TEMPO}", "テンポ")
-        html = html.replace("{METER_TEMPO_LEVEL}", str(meters.get("tempo_level", 3)))
-        html = html.replace("{METER_LABEL_VOLUME}", "ボリューム")
-        html = html.replace("{METER_VOLUME_LEVEL}", str(meters.get("volume_level", 3)))
-
-        # Labels/Notes
-        html = html.replace("{EXTERNAL_LINK_LABEL}", external_link_label)
-        html = html.replace("{NOTICE_18}", "")
-        html = html.replace("{NOTICE_EXTERNAL}", "外部サイトへ移動します")
         default_cta = "今すぐ作品をチェックする"
-        html = html.replace("{CTA_BUTTON_LABEL_TOP}", cta_label_primary or default_cta)
-        html = html.replace("{CTA_URL_TOP}", aff_url)
-        html = html.replace("{CTA_SUBLINE_1}", cta_subline_1 if cta_subline_1 is not None else "会員登録なしですぐにデモ視聴可能")
-        html = html.replace("{CTA_SUBLINE_2}", cta_subline_2 if cta_subline_2 is not None else "安心の公式リンク（DMM.co.jp）")
-        html = html.replace("{EXTERNAL_LINK_LINE}", f"※{external_link_label}へ移動します")
-
-        # Placeholder for visual
-        html = html.replace("{EYECATCH_PLACEHOLDER}", "")
-
-        return html
+        return _fill(html, {
+            "EYECATCH_URL": package_image_url,
+            "TITLE": title,
+            "SHORT_DESCRIPTION": short_description,
+            "HIGHLIGHT_1": highlights[0] if len(highlights) > 0 else "",
+            "HIGHLIGHT_2": highlights[1] if len(highlights) > 1 else "",
+            "HIGHLIGHT_3": highlights[2] if len(highlights) > 2 else "",
+            "HERO_CALLOUT_TITLE": callout_title,
+            "HERO_CALLOUT_BODY": callout_body,
+            # Meters
+            "METER_LABEL_TEMPO": "テンポ",
+            "METER_TEMPO_LEVEL": str(meters.get("tempo_level", 3)),
+            "METER_LABEL_VOLUME": "ボリューム",
+            "METER_VOLUME_LEVEL": str(meters.get("volume_level", 3)),
+            # Labels/Notes
+            "EXTERNAL_LINK_LABEL": external_link_label,
+            "NOTICE_18": "",
+            "NOTICE_EXTERNAL": "外部サイトへ移動します",
+            "CTA_BUTTON_LABEL_TOP": cta_label_primary or default_cta,
+            "CTA_URL_TOP": aff_url,
+            "CTA_SUBLINE_1": cta_subline_1 if cta_subline_1 is not None else "会員登録なしですぐにデモ視聴可能",
+            "CTA_SUBLINE_2": cta_subline_2 if cta_subline_2 is not None else "安心の公式リンク（DMM.co.jp）",
+            "EXTERNAL_LINK_LINE": f"※{external_link_label}へ移動します",
+            # Placeholder for visual
+            "EYECATCH_PLACEHOLDER": "",
+        })
     
     def render_spec(self, item: dict, site_id: str = "default") -> str:
         """作品スペックセクションをレンダリング"""
@@ -464,9 +489,6 @@ class Renderer:
         if site_id == "sd02-shirouto":
             spec_title = "素人詳細スペック"
             
-        html = html.replace("{SPEC_TITLE}", spec_title)
-        html = html.replace("{SPEC_TOGGLE_HINT}", "クリックで詳細を表示")
-        
         labels = ["配信開始日", "出演者", "メーカー", "品番"]
         release_date = str(item.get("release_date", "") or "").strip() or "N/A"
         actress_links = self._render_spec_people_links(item.get("actress", []) or [])
@@ -480,31 +502,35 @@ class Renderer:
             self._escape(product_id),
         ]
         
+        fields = {
+            "SPEC_TITLE": spec_title,
+            "SPEC_TOGGLE_HINT": "クリックで詳細を表示",
+            "SPEC_NOTE": "※情報は配信当時のものです。最新の情報はリンク先でご確認ください。",
+        }
         for i in range(4):
-            html = html.replace(f"{{SPEC_LABEL_{i+1}}}", labels[i])
-            html = html.replace(f"{{SPEC_VALUE_{i+1}}}", values[i])
-            
-        html = html.replace("{SPEC_NOTE}", "※情報は配信当時のものです。最新の情報はリンク先でご確認ください。")
-        return html
+            fields[f"SPEC_LABEL_{i+1}"] = labels[i]
+            fields[f"SPEC_VALUE_{i+1}"] = values[i]
+        return _fill(html, fields)
 
     def render_feature(self, index: int, scene: dict, image_url: str) -> str:
         """特徴（見どころ）カードを1枚レンダリング"""
         html = self._load_template("feature.html") # 新規作成
-        html = html.replace("{FEATURE_INDEX}", str(index + 1))
-        html = html.replace("{FEATURE_LABEL}", scene.get("feature_label", f"見どころ {index + 1}"))
-        html = html.replace("{FEATURE_CHECK}", scene.get("feature_check", "ここが最高！"))
-        html = html.replace("{FEATURE_DESCRIPTION}", scene.get("points", ""))
-        html = html.replace("{FEATURE_METER_LABEL}", "興奮度")
-        html = html.replace("{FEATURE_LEVEL}", str(scene.get("feature_level", 4)))
         
         # 画像スロット
         if image_url:
-            img_tag = f'<img src="{image_url}" alt="scene {index+1}" class="aa-img" />'
-            html = html.replace("{FEATURE_1_IMAGE_SLOT}", img_tag) # 汎用プレースホルダ
+            image_slot = f'<img src="{image_url}" alt="scene {index+1}" class="aa-img" />'
         else:
-            html = html.replace("{FEATURE_1_IMAGE_SLOT}", "画像準備中")
+            image_slot = "画像準備中"
             
-        return html
+        return _fill(html, {
+            "FEATURE_INDEX": str(index + 1),
+            "FEATURE_LABEL": scene.get("feature_label", f"見どころ {index + 1}"),
+            "FEATURE_CHECK": scene.get("feature_check", "ここが最高！"),
+            "FEATURE_DESCRIPTION": scene.get("points", ""),
+            "FEATURE_METER_LABEL": "興奮度",
+            "FEATURE_LEVEL": str(scene.get("feature_level", 4)),
+            "FEATURE_1_IMAGE_SLOT": image_slot, # 汎用プレースホルダ
+        })
 
     def render_checklist(self, checklist_data: dict, site_id: str = "default") -> str:
         """要素チェック表をレンダリング"""
@@ -514,43 +540,42 @@ class Renderer:
         if site_id == "sd02-shirouto":
             checklist_title = "素人鑑定チェックリスト"
             
-        html = html.replace("{CHECKLIST_TITLE}", checklist_title)
-        html = html.replace("{CHECKLIST_NOTE}", "ベテランレビュアーによる俺得評価")
+        fields = {
+            "CHECKLIST_TITLE": checklist_title,
+            "CHECKLIST_NOTE": "ベテランレビュアーによる俺得評価",
+            "LEGEND_ON": "アリ",
+            "LEGEND_OFF": "ナシ",
+            "LEGEND_MAYBE": "微妙",
+        }
         
         items = checklist_data.get("items", [])
         for i in range(10):
-            label = items[i]["label"] if i < len(items) else "-"
-            state = items[i]["state"] if i < len(items) else "off"
-            html = html.replace(f"{{TAG_{i+1}_LABEL}}", label)
-            html = html.replace(f"{{TAG_{i+1}_STATE}}", state)
+            fields[f"TAG_{i+1}_LABEL"] = items[i]["label"] if i < len(items) else "-"
+            fields[f"TAG_{i+1}_STATE"] = items[i]["state"] if i < len(items) else "off"
             
-        html = html.replace("{LEGEND_ON}", "アリ")
-        html = html.replace("{LEGEND_OFF}", "ナシ")
-        html = html.replace("{LEGEND_MAYBE}", "微妙")
-        return html
+        return _fill(html, fields)
 
     def render_safety(self) -> str:
         """安心・注意カードをレンダリング"""
         html = self._load_template("safety.html") # 新規作成
-        html = html.replace("{SAFETY_TITLE}", "安心してご利用いただくために")
-        html = html.replace("{CALLOUT_1_TITLE}", "18歳未満禁止")
-        html = html.replace("{CALLOUT_1_BODY}", "本作品は成人向けです。18歳未満の方は閲覧・購入できません。")
-        html = html.replace("{CALLOUT_2_TITLE}", "公式リンク")
-        html = html.replace("{CALLOUT_2_BODY}", "当サイトはDMMアフィリエイトとして公式の正規配信サイトへのみ誘導します。")
-        html = html.replace("{CALLOUT_3_TITLE}", "ネタバレ配慮")
-        html = html.replace("{CALLOUT_3_BODY}", "レビューには一部内容が含まれますが、結末等の重大なネタバレは避けています。")
-        return html
+        return _fill(html, {
+            "SAFETY_TITLE": "安心してご利用いただくために",
+            "CALLOUT_1_TITLE": "18歳未満禁止",
+            "CALLOUT_1_BODY": "本作品は成人向けです。18歳未満の方は閲覧・購入できません。",
+            "CALLOUT_2_TITLE": "公式リンク",
+            "CALLOUT_2_BODY": "当サイトはDMMアフィリエイトとして公式の正規配信サイトへのみ誘導します。",
+            "CALLOUT_3_TITLE": "ネタバレ配慮",
+            "CALLOUT_3_BODY": "レビューには一部内容が含まれますが、結末等の重大なネタバレは避けています。",
+        })
 
     def render_faq(self, faqs: list[dict]) -> str:
         """FAQセクションをレンダリング"""
         html = self._load_template("faq.html") # 新規作成
-        html = html.replace("{FAQ_TITLE}", "よくある質問")
+        fields = {"FAQ_TITLE": "よくある質問"}
         for i in range(5):
-            q = faqs[i]["q"] if i < len(faqs) else "視聴に会員登録は必要ですか？"
-            a = faqs[i]["a"] if i < len(faqs) else "はい、DMMの無料会員登録が必要です。一部デモ動画は登録なしでも見られます。"
-            html = html.replace(f"{{FAQ_Q{i+1}}}", q)
-            html = html.replace(f"{{FAQ_A{i+1}}}", a)
-        return html
+            fields[f"FAQ_Q{i+1}"] = faqs[i]["q"] if i < len(faqs) else "視聴に会員登録は必要ですか？"
+            fields[f"FAQ_A{i+1}"] = faqs[i]["a"] if i < len(faqs) else "はい、DMMの無料会員登録が必要です。一部デモ動画は登録なしでも見られます。"
+        return _fill(html, fields)
 
     def _escape(self, value: Any) -> str:
         return html.escape(str(value or ""), quote=True)
@@ -796,37 +821,36 @@ class Renderer:
         
         parts.append('</div>')
         
-        # スタイルシートを追加
-        parts.append(self._styles_template)
-        # NOTE: JavaScript削除 - WordPress/Cocoonが<script>タグを除去し、
-        # 中身のJSがプレーンテキストとして残り、White Screen of Deathを引き起こすため
-        # Sticky CTAのJS機能は無効化（将来的にはテーマ側かプラグインで対応）
-        
         body = "\n\n".join(parts)
         
-        # サイト別ボタンクラスを置換
+        # サイト別ボタンクラスを置換（プレースホルダーを含まないスタイルシートは走査しない）
         site_button_class = f"aa-btn-{site_id}" if site_id != "default" else ""
         body = body.replace("{SITE_BUTTON_CLASS}", site_button_class)
         
+        # スタイルシートを追加
+        body = f"{body}\n\n{self._styles_template}"
+        # NOTE: JavaScript削除 - WordPress/Cocoonが<script>タグを除去し、
+        # 中身のJSがプレーンテキストとして残り、White Screen of Deathを引き起こすため
+        # Sticky CTAのJS機能は無効化（将来的にはテーマ側かプラグインで対応）
+        
         # ブロックエディタのHTMLブロックとして包み、wpautopの崩れを抑制
         return f"<!-- wp:html -->\n{body}\n<!-- /wp:html -->"
 
     def render_summary(self, summary_text: str) -> str:
         """総評セクションをレンダリング"""
-        html = self._summary_template
-        html = html.replace("{SUMMARY_TITLE}", "まとめ")
-        return html.replace("{SUMMARY_TEXT}", summary_text)
+        return _fill(self._summary_template, {"SUMMARY_TITLE": "まとめ", "SUMMARY_TEXT": summary_text})
 
     def render_cta_mid(self, aff_url: str, cta_label_secondary: str | None = None) -> str:
         """中間CTA (D) をレンダリング"""
         html = self._load_template("cta.html")
-        html = html.replace("{CTA_URL_MID}", aff_url)
         default_cta = "まずは無料デモで興奮を確かめる"
-        html = html.replace("{CTA_BUTTON_LABEL_MID}", cta_label_secondary or default_cta)
-        html = html.replace("{CTA_MID_SUBLINE_1}", "会員登録なしで1分以上のサンプル視聴が可能")
-        html = html.replace("{CTA_MID_SUBLINE_2}", "※リンク先で「動画サンプル」をクリック")
-        html = html.replace("{EXTERNAL_LINK_LINE}", "※DMM.co.jp（公式）へ移動します")
-        return html
+        return _fill(html, {
+            "CTA_URL_MID": aff_url,
+            "CTA_BUTTON_LABEL_MID": cta_label_secondary or default_cta,
+            "CTA_MID_SUBLINE_1": "会員登録なしで1分以上のサンプル視聴が可能",
+            "CTA_MID_SUBLINE_2": "※リンク先で「動画サンプル」をクリック",
+            "EXTERNAL_LINK_LINE": "※DMM.co.jp（公式）へ移動します",
+        })
 
     def render_cta_final(
         self,
@@ -839,20 +863,19 @@ class Renderer:
     ) -> str:
         """最終CTA (I) をレンダリング"""
         html = self._load_template("cta_bottom.html")
-        html = html.replace("{CTA_URL_FINAL}", aff_url)
         default_cta = "今すぐこの快楽を本編で堪能する"
-        html = html.replace("{CTA_BUTTON_LABEL_FINAL}", cta_label_primary or default_cta)
-        html = html.replace("{CTA_FINAL_NOTE_1}", cta_note_1 or "DMMなら最高画質ですぐに視聴開始")
-        html = html.replace("{CTA_FINAL_NOTE_2}", cta_note_2 or "※18歳未満は閲覧できません")
-        html = html.replace("{CTA_FINAL_NOTE_3}", cta_note_3 or "")
+        html = _fill(html, {
+            "CTA_URL_FINAL": aff_url,
+            "CTA_BUTTON_LABEL_FINAL": cta_label_primary or default_cta,
+            "CTA_FINAL_NOTE_1": cta_note_1 or "DMMなら最高画質ですぐに視聴開始",
+            "CTA_FINAL_NOTE_2": cta_note_2 or "※18歳未満は閲覧できません",
+            "CTA_FINAL_NOTE_3": cta_note_3 or "",
+            "EXTERNAL_LINK_LINE": external_link_line if external_link_line is not None else "※DMM.co.jp（公式）へ移動します",
+        })
         if not cta_note_3:
-            html = re.sub(r"\n\s*<div class=\"aa-note-line\">\s*</div>", "", html)
-        html = html.replace(
-            "{EXTERNAL_LINK_LINE}",
-            external_link_line if external_link_line is not None else "※DMM.co.jp（公式）へ移動します",
-        )
+            html = _EMPTY_NOTE_LINE_RE.sub("", html)
         if external_link_line == "":
-            html = re.sub(r"\n\s*<div class=\"aa-extline\">\s*</div>", "", html)
+            html = _EMPTY_EXTLINE_RE.sub("", html)
         return html
 
     def render_meters_section(self, meters: dict) -> str:
@@ -919,21 +942,17 @@ class Renderer:
 
     def render_rating(self, ratings: dict) -> str:
         """評価セクションをレンダリング"""
-        html = self._rating_template
         # テンプレートは {{...}} 形式を使用している
-        mapping = {
-            "{{RATING_EASE}}": ratings.get("ease", "★★★★☆"),
-            "{{RATING_EASE_NOTE}}": ratings.get("ease_note", "初心者でも安心"),
-            "{{RATING_FETISH}}": ratings.get("fetish", "★★★★★"),
-            "{{RATING_FETISH_NOTE}}": ratings.get("fetish_note", "性癖に刺さる"),
-            "{{RATING_VOLUME}}": ratings.get("volume", "★★★★☆"),
-            "{{RATING_VOLUME_NOTE}}": ratings.get("volume_note", "大満足のボリューム"),
-            "{{RATING_REPEAT}}": ratings.get("repeat", "★★★★☆"),
-            "{{RATING_REPEAT_NOTE}}": ratings.get("repeat_note", "何度でも見たい"),
-        }
-        for k, v in mapping.items():
-            html = html.replace(k, v)
-        return html
+        return _fill_double(self._rating_template, {
+            "RATING_EASE": ratings.get("ease", "★★★★☆"),
+            "RATING_EASE_NOTE": ratings.get("ease_note", "初心者でも安心"),
+            "RATING_FETISH": ratings.get("fetish", "★★★★★"),
+            "RATING_FETISH_NOTE": ratings.get("fetish_note", "性癖に刺さる"),
+            "RATING_VOLUME": ratings.get("volume", "★★★★☆"),
+            "RATING_VOLUME_NOTE": ratings.get("volume_note", "大満足のボリューム"),
+            "RATING_REPEAT": ratings.get("repeat", "★★★★☆"),
+            "RATING_REPEAT_NOTE": ratings.get("repeat_note", "何度でも見たい"),
+        })
 
     def render_video(self, sample_movie_url: str) -> str:
         """動画セクションをレンダリング"""
@@ -3,13 +3,17 @@
 """
 import logging
 import re
-from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
 from typing import List, Tuple, Dict, Any
 
 from ..clients.wordpress import WPClient
 
 logger = logging.getLogger(__name__)
 
+# 本文中のアフィリエイトリンクから商品IDを拾う
+_CID_RE = re.compile(r'cid=([a-z0-9]+)')
+
 class MaintenanceService:
     """WordPressの投稿管理・クリーンアップを担当"""
     
@@ -21,35 +25,38 @@ class MaintenanceService:
         logger.info("重複投稿のチェックを開始...")
         
         all_posts = self._fetch_all_posts(limit)
-        fanza_id_posts = defaultdict(list)
+        keyed: List[Tuple[str, Dict[str, Any]]] = []
         
         for p in all_posts:
             fanza_id = p.get('meta', {}).get('fanza_product_id', '')
             if not fanza_id:
                 # コンテンツから抽出試行
                 content = p.get('content', {}).get('rendered', '')
-                match = re.search(r'cid=([a-z0-9]+)', content)
+                match = _CID_RE.search(content)
                 if match:
                     fanza_id = match.group(1)
             
             if fanza_id:
-                fanza_id_posts[fanza_id].append(p)
+                keyed.append((fanza_id, p))
         
+        # FANZA ID→投稿IDの順に1回だけソートし、連続する同一IDをまとめて走査
+        keyed.sort(key=lambda kp: (kp[0], kp[1]['id']))
         duplicates = []
-        for fanza_id, posts in fanza_id_posts.items():
-            if len(posts) > 1:
-                # 投稿IDが小さい（古い）ものを削除対象に
-                posts_sorted = sorted(posts, key=lambda x: x['id'])
-                for p in posts_sorted[:-1]:
-                    duplicates.append(p)
-                    logger.info(f"重複検出: ID={p['id']}, FANZA={fanza_id}, Title={p['title']['rendered'][:30]}...")
+        for fanza_id, group in groupby(keyed, key=itemgetter(0)):
+            posts_sorted = [p for _, p in group]
+            # 投稿IDが小さい（古い）ものを削除対象に
+            for p in posts_sorted[:-1]:
+                duplicates.append(p)
+                logger.info(f"重複検出: ID={p['id']}, FANZA={fanza_id}, Title={p['title']['rendered'][:30]}...")
         
         return duplicates
 
     def find_bad_posts(self, limit: int = 100) -> List[Dict[str, Any]]:
         """アイキャッチなし、またはFANZA IDなしの問題投稿を検出"""
         logger.info("問題のある投稿のチェックを開始...")
-        posts = self.wp.get_recent_posts(limit=limit, status="publish")
+        posts = self.wp.get_recent_posts(
+            limit=limit, status="publish", fields="id,title,content,meta,featured_media"
+        )
         
         bad_posts = []
         for post in posts:
@@ -58,7 +65,7 @@ class MaintenanceService:
             
             if not fanza_id:
                 content = post.get('content', {}).get('rendered', '')
-                match = re.search(r'cid=([a-z0-9]+)', content)
+                match = _CID_RE.search(content)
                 if match:
                     fanza_id = match.group(1)
             
@@ -72,13 +79,14 @@ class MaintenanceService:
     def delete_posts(self, posts: List[Dict[str, Any]], force: bool = True) -> int:
         """指定された投稿を削除"""
         deleted_count = 0
+        errors = self.wp.delete_posts([p['id'] for p in posts], force=force)
         for p in posts:
-            try:
-                self.wp._request('DELETE', f"posts/{p['id']}", params={'force': force})
+            err = errors.get(p['id'])
+            if err is None:
                 logger.info(f"削除成功: ID={p['id']}, Title={p['title']['rendered'][:30]}...")
                 deleted_count += 1
-            except Exception as e:
-                logger.error(f"削除失敗: ID={p['id']}, Error={e}")
+            else:
+                logger.error(f"削除失敗: ID={p['id']}, Error={err}")
         return deleted_count
 
     def _fetch_all_posts(self, limit: int = 1000) -> List[Dict[str, Any]]:
@@ -92,7 +100,9 @@ class MaintenanceService:
                 response = self.wp._request('GET', 'posts', params={
                     'status': 'publish',
                     'per_page': per_page,
-                    'page': page
+                    'page': page,
+                    # 重複判定に使う項目だけ返させる
+                    '_fields': 'id,title,meta,content',
                 })
                 posts = response.json()
                 if not posts or not isinstance(posts, list):
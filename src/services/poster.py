@@ -3,6 +3,7 @@
 """
 import logging
 import os
+import re
 import sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any, Optional
@@ -20,8 +21,33 @@ from src.processor.images import ImageTools, ImagePlaceholderError
 
 logger = logging.getLogger(__name__)
 
+# ジャンル文字列から大カテゴリを決める（上から順に優先。キーワード群はカテゴリごとに1本の正規表現へ）
+_BIG_CATEGORY_KEYWORDS = [
+    ("VR作品", ["VR", "ハイクオリティVR"]),
+    ("アニメ・2D", ["アニメ", "二次元", "CG"]),
+    ("素人・ナンパ", ["素人", "ナンパ", "投稿", "地味"]),
+    ("熟女・人妻", ["熟女", "人妻", "お姉さん", "四十路", "美魔女", "お母さん"]),
+    ("美少女・若手", ["美少女", "若手", "新人", "10代", "女子大生"]),
+    ("巨乳・爆乳", ["巨乳", "爆乳", "爆にゅう"]),
+    ("単体女優", ["単体作品"]),
+    ("企画・バラエティ", ["企画", "バラエティー", "コスプレ"]),
+]
+_BIG_CATEGORY_PATTERNS = [
+    (big_cat, re.compile("|".join(map(re.escape, keywords))))
+    for big_cat, keywords in _BIG_CATEGORY_KEYWORDS
+]
+
+# シーン画像に使うサンプル画像の位置（足りない分は先頭から補う）
+_SCENE_SAMPLE_INDICES = (2, 5, 8)
+
+# サンプル画像の枚数(10枚以上は10) -> アイキャッチに使う画像の位置（おおむね中央）
+_EYECATCH_INDEX = (0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5)
+
 class PosterService:
     """記事投稿のワークフローを管理"""
+
+    # 画像転送の同時実行数（1商品あたり最大5枚）
+    _IMAGE_WORKERS = 8
     
     def __init__(
         self,
@@ -40,6 +66,32 @@ class PosterService:
         self.renderer = renderer
         self.dedupe_store = dedupe_store
         self.image_tools = image_tools
+        # 画像のダウンロード+アップロード用スレッドは商品ごとに作らず使い回す（商品並列時も共有）
+        self._image_executor = ThreadPoolExecutor(
+            max_workers=self._IMAGE_WORKERS, thread_name_prefix="image-upload"
+        )
+
+    def close(self) -> None:
+        """画像転送用のスレッドを停止"""
+        self._image_executor.shutdown(wait=True)
+
+    def _discard_uploads(self, futures, media_ids: list[int | None]) -> None:
+        """スキップ時に、並列で転送済み/転送中のメディアを削除してWP上に孤立させない"""
+        for future in futures:
+            future.cancel()
+        created = [media_id for media_id in media_ids if media_id]
+        for future in futures:
+            if future.cancelled():
+                continue
+            res = future.result()
+            if res.get("id"):
+                created.append(res["id"])
+        for media_id in dict.fromkeys(created):
+            try:
+                self.wp_client.delete_media(media_id)
+                logger.info("スキップに伴いアップロード済みメディアを削除: media_id=%s", media_id)
+            except Exception as e:
+                logger.warning("アップロード済みメディアの削除に失敗: media_id=%s %s", media_id, e)
 
     def process_item(self, idx: int, total: int, item: dict, dry_run: bool = False, site_info: Any = None) -> str:
         """1件の商品を処理して投稿する"""
@@ -48,34 +100,30 @@ class PosterService:
         try:
             # 既に投稿済み/処理中なら開始しない（原子的に確保）
             if not self.dedupe_store.try_start(product_id):
-                logger.info(f"duplicate/processing skip: {product_id}")
+                logger.info("duplicate/processing skip: %s", product_id)
                 return "skip"
             sys.stdout.flush()
             
             # 最終チェック: すでにWP側に記事がないか確認
             if not dry_run:
                 if self.wp_client.check_post_exists_by_fanza_id(product_id):
-                    logger.info(f"スキップ: すでに同じFANZA IDの記事が存在します (WP側): {product_id}")
+                    logger.info("スキップ: すでに同じFANZA IDの記事が存在します (WP側): %s", product_id)
                     # ローカルDB側も成功扱いとして記録（次回以降is_postedで弾けるようにする）
                     self.dedupe_store.record_success(product_id, status="published")
                     return "skip"
                     
                 if self.wp_client.check_post_exists_by_slug(product_id):
-                    logger.info(f"スキップ: すでにWordPress上に記事が存在します (slug match): {product_id}")
+                    logger.info("スキップ: すでにWordPress上に記事が存在します (slug match): %s", product_id)
                     self.dedupe_store.record_success(product_id, status="published")
                     return "skip"
 
             # シーン用の画像URLを決定
             sample_pool = item.get("sample_image_urls", [])
             if not sample_pool:
-                logger.warning(f"サンプル画像が1枚もないためスキップします: {product_id}")
+                logger.warning("サンプル画像が1枚もないためスキップします: %s", product_id)
                 return "skip"
             
-            targets = [2, 5, 8]
-            scene_image_urls = []
-            for t in targets:
-                if t < len(sample_pool):
-                    scene_image_urls.append(sample_pool[t])
+            scene_image_urls = [sample_pool[t] for t in _SCENE_SAMPLE_INDICES if t < len(sample_pool)]
             
             if len(scene_image_urls) < 3:
                 for url in sample_pool:
@@ -84,13 +132,13 @@ class PosterService:
                     if len(scene_image_urls) >= 3:
                         break
             
-            logger.info(f"シーン用画像: {len(scene_image_urls)}枚を選択")
+            logger.info("シーン用画像: %s枚を選択", len(scene_image_urls))
             
             # AI生成 (site_info を渡す)
             ai_response = self.llm_client.generate(item=item, sample_image_urls=scene_image_urls, site_info=site_info)
             sys.stdout.flush()
             
-            logger.info(f"AI応答取得完了: title={ai_response.get('title', '')[:30]}...")
+            logger.info("AI応答取得完了: title=%s...", ai_response.get('title', '')[:30])
             
             # 画像アップロード
             featured_media_id = None
@@ -109,80 +157,88 @@ class PosterService:
                         img_bytes, filename, mime_type = self.image_tools.download_to_bytes(item["package_image_url"])
                         result = self.wp_client.upload_media(file_bytes=img_bytes, filename=filename, mime_type=mime_type)
                         featured_media_id = result.get("id")
-                        logger.info(f"USE_CDN_IMAGES時のアイキャッチ確保アップロード完了: media_id={featured_media_id}")
+                        logger.info("USE_CDN_IMAGES時のアイキャッチ確保アップロード完了: media_id=%s", featured_media_id)
                     except ImagePlaceholderError as e:
-                        logger.warning(f"アイキャッチ用画像が未準備のためスキップ: {e}")
+                        logger.warning("アイキャッチ用画像が未準備のためスキップ: %s", e)
                         return "skip"
                     except Exception as e:
-                        logger.error(f"USE_CDN_IMAGES時のアイキャッチ確保アップロード失敗: {e}")
+                        logger.error("USE_CDN_IMAGES時のアイキャッチ確保アップロード失敗: %s", e)
                 item["_featured_media_id"] = featured_media_id
             elif not dry_run:
-                if item.get("package_image_url"):
+                def upload_package(url):
                     try:
-                        img_bytes, filename, mime_type = self.image_tools.download_to_bytes(item["package_image_url"])
+                        img_bytes, filename, mime_type = self.image_tools.download_to_bytes(url)
                         result = self.wp_client.upload_media(file_bytes=img_bytes, filename=filename, mime_type=mime_type)
-                        item["package_image_url"] = result.get("source_url", item["package_image_url"])
-                        package_media_id = result.get("id")
-                        logger.info(f"パッケージ画像アップロード完了: {item['package_image_url']}")
+                        return {"url": result.get("source_url", url), "id": result.get("id")}
                     except ImagePlaceholderError as e:
-                        logger.warning(f"画像がまだ準備されていません。スキップ: {e}")
-                        return "skip"
+                        logger.warning("画像がまだ準備されていません。スキップ: %s", e)
+                        return {"error": "placeholder"}
                     except Exception as e:
-                        logger.warning(f"パッケージ画像アップロード失敗。CDN画像で継続します: {e}")
-                
-                # 画像アップロードの並列化
-                new_sample_urls = [None] * len(scene_image_urls[:3])
+                        logger.warning("パッケージ画像アップロード失敗。CDN画像で継続します: %s", e)
+                        return {"error": "failed"}
+
+                # 画像アップロードの並列化（パッケージ・シーン・アイキャッチを同時に転送）
+                scene_urls = scene_image_urls[:3]
+                new_sample_urls = [None] * len(scene_urls)
                 
-                def upload_task(url, index, is_featured=False):
+                def upload_task(url):
                     try:
                         img_bytes, filename, mime_type = self.image_tools.download_to_bytes(url)
                         result = self.wp_client.upload_media(file_bytes=img_bytes, filename=filename, mime_type=mime_type)
-                        return {"index": index, "url": result.get("source_url", url), "id": result.get("id"), "is_featured": is_featured}
+                        return {"url": result.get("source_url", url), "id": result.get("id")}
                     except ImagePlaceholderError as e:
-                        logger.warning(f"画像プレースホルダーにつきスキップ: {url}")
-                        return {"error": "placeholder", "index": index}
+                        logger.warning("画像プレースホルダーにつきスキップ: %s", url)
+                        return {"error": "placeholder"}
                     except Exception as e:
-                        logger.error(f"画像アップロード失敗: {url} - {e}")
+                        logger.error("画像アップロード失敗: %s - %s", url, e)
                         # アップロード失敗時はオリジナルのCDN URLをフォールバックとして使用
-                        return {"index": index, "url": url, "id": None, "is_featured": is_featured, "fallback": True}
+                        return {"url": url, "id": None, "fallback": True}
 
-                upload_jobs = []
-                # シーン画像
-                for i, sample_url in enumerate(scene_image_urls[:3]):
-                    upload_jobs.append((sample_url, i, False))
                 # アイキャッチ
                 eyecatch_url = None
                 if sample_pool:
-                    indices = [10, 8, 6, 4, 2]
-                    eyecatch_idx = 0
-                    for threshold in indices:
-                        if len(sample_pool) >= threshold:
-                            eyecatch_idx = threshold // 2
-                            break
-                    eyecatch_url = sample_pool[eyecatch_idx]
-                    upload_jobs.append((eyecatch_url, -1, True)) # -1 is eyecatch
+                    eyecatch_url = sample_pool[_EYECATCH_INDEX[min(len(sample_pool), 10)]]
+
+                # アイキャッチがシーン画像と同じURLになることがあるので、URL単位で1回だけ転送する
+                upload_urls = list(dict.fromkeys(scene_urls + ([eyecatch_url] if eyecatch_url else [])))
 
-                with ThreadPoolExecutor(max_workers=4) as executor:
-                    futures = [executor.submit(upload_task, job[0], job[1], job[2]) for job in upload_jobs]
-                    for future in as_completed(futures):
-                        res = future.result()
-                        if "error" in res:
-                            if res["error"] == "placeholder": return "skip"
-                            continue
-                        
-                        if res["is_featured"]:
-                            featured_media_id = res["id"]
-                            logger.info(f"アイキャッチ画像アップロード完了: media_id={featured_media_id}")
-                        else:
-                            new_sample_urls[res["index"]] = res["url"]
-                            logger.info(f"サンプル画像{res['index']+1}アップロード完了")
+                # 値がNoneのfutureはパッケージ画像（プレースホルダー判定の要なので最初に投入）
+                futures = {}
+                if item.get("package_image_url"):
+                    futures[self._image_executor.submit(upload_package, item["package_image_url"])] = None
+                for url in upload_urls:
+                    futures[self._image_executor.submit(upload_task, url)] = url
+
+                for future in as_completed(futures):
+                    url = futures[future]
+                    res = future.result()
+                    if "error" in res:
+                        if res["error"] == "placeholder":
+                            # 並列で転送中/転送済みのメディア（パッケージ含む）を取り消してからスキップ
+                            self._discard_uploads(futures, [])
+                            return "skip"
+                        continue
+
+                    if url is None:
+                        item["package_image_url"] = res["url"]
+                        package_media_id = res["id"]
+                        logger.info("パッケージ画像アップロード完了: %s", item['package_image_url'])
+                        continue
+                    
+                    if url == eyecatch_url:
+                        featured_media_id = res["id"]
+                        logger.info("アイキャッチ画像アップロード完了: media_id=%s", featured_media_id)
+                    for i, scene_url in enumerate(scene_urls):
+                        if scene_url == url:
+                            new_sample_urls[i] = res["url"]
+                            logger.info("サンプル画像%sアップロード完了", i+1)
 
                 # アイキャッチ専用画像のアップロードに失敗した場合は、
                 # 既にアップロード済みのパッケージ画像をフォールバックで利用する。
                 if not featured_media_id and package_media_id:
                     featured_media_id = package_media_id
                     logger.warning(
-                        f"アイキャッチ画像IDが未取得のためパッケージ画像を代替利用: media_id={featured_media_id}"
+                        "アイキャッチ画像IDが未取得のためパッケージ画像を代替利用: media_id=%s", featured_media_id
                     )
 
                 item["sample_image_urls"] = [u for u in new_sample_urls if u is not None]
@@ -207,22 +263,12 @@ class PosterService:
             genres_str = "".join(genres_raw)
             title_str = item.get("title", "")
 
-            mapping_order = [
-                ("VR作品", ["VR", "ハイクオリティVR"]),
-                ("アニメ・2D", ["アニメ", "二次元", "CG"]),
-                ("素人・ナンパ", ["素人", "ナンパ", "投稿", "地味"]),
-                ("熟女・人妻", ["熟女", "人妻", "お姉さん", "四十路", "美魔女", "お母さん"]),
-                ("美少女・若手", ["美少女", "若手", "新人", "10代", "女子大生"]),
-                ("巨乳・爆乳", ["巨乳", "爆乳", "爆にゅう"]),
-                ("単体女優", ["単体作品"]),
-                ("企画・バラエティ", ["企画", "バラエティー", "コスプレ"]),
-            ]
             selected_big_cat = "動画"
             if "VR" in title_str.upper():
                 selected_big_cat = "VR作品"
             else:
-                for big_cat, keywords in mapping_order:
-                    if any(kw in genres_str for kw in keywords):
+                for big_cat, pattern in _BIG_CATEGORY_PATTERNS:
+                    if pattern.search(genres_str):
                         selected_big_cat = big_cat
                         break
 
@@ -255,7 +301,7 @@ class PosterService:
                     exclude_fanza_id=product_id,
                 )
             except Exception as e:
-                logger.warning(f"related posts fetch failed: {e}")
+                logger.warning("related posts fetch failed: %s", e)
             
             content_html = self.renderer.render_post_content(
                 item,
@@ -287,9 +333,9 @@ body {{ max-width: 800px; margin: 0 auto; padding: 20px; font-family: sans-serif
 </body>
 </html>"""
                     preview_path.write_text(full_html, encoding="utf-8")
-                    logger.info(f"【ドライラン】プレビューHTMLを保存しました: {preview_path}")
+                    logger.info("【ドライラン】プレビューHTMLを保存しました: %s", preview_path)
                 except Exception as e:
-                    logger.warning(f"プレビュー保存失敗: {e}")
+                    logger.warning("プレビュー保存失敗: %s", e)
 
                 self.dedupe_store.record_success(product_id, wp_post_id=None, status="dry_run")
                 return "success"
@@ -320,6 +366,6 @@ body {{ max-width: 800px; margin: 0 auto; padding: 20px; font-family: sans-serif
             return "success"
                 
         except Exception as e:
-            logger.exception(f"[{idx}/{total}] 処理失敗: {e}")
+            logger.exception("[%s/%s] 処理失敗: %s", idx, total, e)
             self.dedupe_store.record_failure(product_id, str(e))
             return "failure"